@@ -0,0 +1,261 @@
+# batch_score.py
+#
+# Out-of-core batch scoring for large applicant files.
+# The input is streamed in chunks, chunks are scored on a process pool, and
+# results are appended to the output in input order. At most
+# `workers * IN_FLIGHT_PER_WORKER` chunks are held in memory at once.
+#
+# Usage:
+#   python batch_score.py applicants.csv predictions.csv
+#   python batch_score.py applicants.csv predictions.parquet --chunk-size 200000 --workers 8
+#   python batch_score.py applicants.csv predictions.csv --cache prediction_cache.sqlite
+#   python batch_score.py applicants.csv predictions.csv --route-column product_region   # one model per row
+#
+# With --route-column, each row is scored by the model published under
+# model_store/<value of that column> (see MultiModelRegistry); drift and the
+# prediction cache are per model and are not used in this mode.
+#
+# When the model directory holds a reference profile, every chunk's feature
+# histogram is merged into a DriftMonitor writing to that directory (see
+# drift_monitor.py). When the input has a Churn column, per-chunk evaluation
+# counts are merged into one EvaluationAccumulator and written to
+# EVALUATION_FILE (see evaluation.py).
+
+import argparse
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from drift_monitor import DRIFT_FILE, REFERENCE_PROFILE_FILE, DriftMonitor, load_reference_profile
+from evaluation import EVALUATION_FILE, EvaluationAccumulator, save_evaluation
+from model_registry import MODELS_DIR, MultiModelRegistry, get_registry
+from prediction_cache import PredictionCache, predict_proba_cached
+from scoring import DROP_COLUMNS, ENCODERS_FILE, load_pickle
+
+# --- Config ---
+CHUNK_SIZE = 100_000
+IN_FLIGHT_PER_WORKER = 2
+ID_COLUMN = 'application_id'
+LABEL_COLUMN = 'Churn'
+
+_bundle = None
+_cache = None
+_drift = None
+_models = None
+
+
+# --- Worker side ---
+def _init_worker(directory, cache_path=None, drift_profile=None, models_root=None, default_model=None):
+    global _bundle, _cache, _drift, _models
+    if models_root is not None:
+        _models = MultiModelRegistry(models_root, default=default_model)
+        return
+    _bundle = get_registry(directory).get()
+    if multiprocessing.parent_process() is not None:
+        # Pool worker: one scoring thread per process, the pool provides the parallelism
+        # (on the booster: set_params fails on legacy pickles). With workers == 1 this runs
+        # in the caller's process on the shared registry bundle, which keeps its threads.
+        _bundle.model.get_booster().set_param('nthread', 1)
+    _cache = PredictionCache(disk_path=cache_path) if cache_path else None
+    # Workers only bin their chunk; windows are closed by the driver's monitor
+    _drift = DriftMonitor(drift_profile) if drift_profile else None
+
+
+def score_chunk(chunk, keep_columns=False, route_column=None):
+    """
+    Score one chunk; returns (output frame, rows served from the cache, drift histogram counts or None,
+    evaluation accumulator or None when the chunk has no labels).
+    """
+    if route_column is not None:
+        return _score_routed(chunk, keep_columns, route_column)
+
+    X = _bundle.encode_matrix(chunk)
+    if _cache is not None:
+        served_before = _cache.hits + _cache.disk_hits
+        proba = predict_proba_cached(_bundle, X, _cache)
+        cached = _cache.hits + _cache.disk_hits - served_before
+    else:
+        proba = _bundle.predict_proba(X)
+        cached = 0
+
+    counts = _drift.bin_counts(X, _bundle.feature_names) if _drift is not None else None
+    return _output(chunk, keep_columns, proba, _bundle.version), cached, counts, _evaluate(chunk, proba)
+
+
+def _score_routed(chunk, keep_columns, route_column):
+    """score_chunk for --route-column: every row goes to the model its route names."""
+    routes = chunk[route_column].to_numpy()
+    codes, names = _models.resolve(routes)
+    proba = _models.predict_proba(chunk.drop(columns=route_column), routes)
+    versions = pd.Series([_models.get(name).version for name in names], dtype=object)
+    out = _output(chunk, keep_columns, proba, versions.to_numpy()[codes])
+    out.insert(len(out.columns) - 1, 'Model', names[codes])
+    return out, 0, None, _evaluate(chunk, proba)
+
+
+def _output(chunk, keep_columns, proba, version):
+    out = chunk.copy() if keep_columns else pd.DataFrame(index=chunk.index)
+    if not keep_columns and ID_COLUMN in chunk.columns:
+        out[ID_COLUMN] = chunk[ID_COLUMN]
+    out['Predicted_Churn'] = (proba > 0.5).astype('int8')
+    out['Churn_Probability'] = proba.astype('float32')
+    out['Model_Version'] = version
+    return out
+
+
+def _evaluate(chunk, proba):
+    """Evaluation counts of the chunk's labelled rows, or None when the chunk has no labels."""
+    if LABEL_COLUMN not in chunk.columns:
+        return None
+    labeled = chunk[LABEL_COLUMN].notna().to_numpy()
+    return EvaluationAccumulator().update(chunk[LABEL_COLUMN].to_numpy()[labeled], proba[labeled])
+
+
+# --- Output writers ---
+class CsvSink:
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.path, mode='w' if self.header else 'a', header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    def __init__(self, path):
+        import pyarrow.parquet as pq
+        self.pq = pq
+        self.path = path
+        self.writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        elif not table.schema.equals(self.writer.schema, check_metadata=False):
+            # Each chunk infers its own types (an all-null column comes out as double): use the file's
+            table = table.cast(self.writer.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_sink(path):
+    return ParquetSink(path) if path.endswith('.parquet') else CsvSink(path)
+
+
+# --- Driver ---
+def score_file(input_path, output_path, chunk_size=CHUNK_SIZE, workers=None, keep_columns=False, model_dir=".",
+               cache_path=None, route_column=None, models_root=MODELS_DIR, default_model=None):
+    """
+    Stream `input_path` through the model and write predictions to `output_path` in input order.
+    With route_column, each row is scored by the model under models_root it names (default_model
+    for names with no published model). Returns (rows, cached_rows, seconds, evaluation accumulator
+    or None when the input has no labels).
+    """
+    workers = workers or os.cpu_count() or 1
+    if route_column is None:
+        profile_path = os.path.join(model_dir, REFERENCE_PROFILE_FILE)
+        profile = load_reference_profile(profile_path) if os.path.exists(profile_path) else None
+        init_args = (model_dir, cache_path, profile)
+        encoded = list(get_registry(model_dir).get().label_encoders)
+        model_version = get_registry(model_dir).get().version
+    else:
+        profile = None
+        init_args = (model_dir, None, None, models_root, default_model)
+        names = MultiModelRegistry(models_root).names()
+        encoded = [route_column] + [col for name in names
+                                    for col in load_pickle(os.path.join(models_root, name, ENCODERS_FILE))]
+        model_version = None      # each output row carries the version that scored it
+    drift = DriftMonitor(profile, output_path=os.path.join(model_dir, DRIFT_FILE)) if profile else None
+    evaluation = None
+    sink = open_sink(output_path)
+    # Text columns read as strings in every chunk, even a chunk where they are all empty
+    text_columns = [*encoded, *DROP_COLUMNS]
+    reader = pd.read_csv(input_path, chunksize=chunk_size, dtype={col: 'str' for col in text_columns})
+    rows = cached = 0
+    start = time.perf_counter()
+
+    def collect(scored):
+        nonlocal rows, cached, evaluation
+        result, hits, counts, chunk_eval = scored
+        sink.write(result)
+        rows += len(result)
+        cached += hits
+        if drift is not None:
+            drift.add_counts(counts, len(result))
+        if chunk_eval is not None:
+            evaluation = chunk_eval if evaluation is None else evaluation.merge(chunk_eval)
+
+    try:
+        if workers == 1:
+            _init_worker(*init_args)
+            for chunk in reader:
+                collect(score_chunk(chunk, keep_columns, route_column))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+                pending = deque()
+                for chunk in reader:
+                    pending.append(pool.submit(score_chunk, chunk, keep_columns, route_column))
+                    # Bounded read-ahead keeps memory flat however large the file is
+                    if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                        collect(pending.popleft().result())
+                while pending:
+                    collect(pending.popleft().result())
+        if drift is not None:
+            drift.flush()
+        if evaluation is not None:
+            save_evaluation(evaluation, input=input_path, model_version=model_version)
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - start
+    return rows, cached, elapsed, evaluation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a large applicant file in chunks on a process pool.")
+    parser.add_argument("input", help="Applicant CSV file")
+    parser.add_argument("output", help="Output file (.csv or .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--keep-columns", action="store_true", help="Copy all input columns to the output")
+    parser.add_argument("--model-dir", default=".", help="Directory holding the published model artifacts")
+    parser.add_argument("--cache", default=None, metavar="SQLITE_PATH",
+                        help="Prediction cache shared by all workers; repeated profiles skip the model")
+    parser.add_argument("--route-column", default=None,
+                        help="Score each row with the model under --models-root named by this column")
+    parser.add_argument("--models-root", default=MODELS_DIR, help="Published models for --route-column")
+    parser.add_argument("--default-model", default=None,
+                        help="Model for route values with no published model (default: fail)")
+    args = parser.parse_args()
+    if args.route_column and args.cache:
+        parser.error("--cache is not supported with --route-column")
+
+    print(f"\n📥 Scoring '{args.input}' in chunks of {args.chunk_size:,} rows...")
+    rows, cached, elapsed, evaluation = score_file(args.input, args.output, args.chunk_size, args.workers,
+                                                   args.keep_columns, args.model_dir, args.cache, args.route_column,
+                                                   args.models_root, args.default_model)
+    print(f"✅ {rows:,} rows scored in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/sec)")
+    if args.cache:
+        print(f"🗃️ Prediction cache: {cached:,} of {rows:,} rows served from cache ({cached / max(rows, 1):.1%})")
+    if evaluation is not None:
+        summary = evaluation.summary()
+        print(f"📏 Accuracy {summary['accuracy']:.2%} | F1 {summary['f1']:.3f} | log loss {summary['log_loss']:.4f} | "
+              f"ROC AUC {summary['roc_auc']:.4f} → '{EVALUATION_FILE}'")
+    print(f"💾 Predictions written to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# bitmap_index.py
+#
+# Bitmap indexes over the categorical applicant columns: one bit-packed bitset
+# (uint64 words) per value per column. Predicates use the rules_engine
+# condition format and are answered with bitwise AND / OR / NOT over the
+# bitsets; counts come from popcount, row ids from the set bits.
+# On disk each bitset is zlib-compressed.
+#
+# Usage:
+#   python bitmap_index.py build applicants.csv
+#   python bitmap_index.py count "city_tier=Tier 3" "residence_type=Rented" "smoker=Yes" \
+#                                "existing_conditions=Diabetes" "underwriting_decision=Review"
+#   python bitmap_index.py rows "smoker=Yes" "city_tier=Tier 1|Tier 2" "occupation!=Salaried"
+#   python bitmap_index.py bench [rows]      # vs. a full-scan pandas filter (default 10M rows)
+
+import pickle
+import sys
+import time
+import zlib
+
+import numpy as np
+
+# pandas (and rules_engine, which needs it) is imported only to build an index:
+# loading one and answering count/rows queries is numpy-only
+
+# --- Config ---
+CSV_FILE = 'combined_life_insurance_with_churn_reason.csv'
+INDEX_FILE = 'bitmap_index.pkl'
+SKIP_COLUMNS = ['application_id']
+
+
+# --- Bitset helpers (uint64 words; bits past n_rows are always 0) ---
+def to_bitset(mask):
+    packed = np.packbits(mask, bitorder='little')
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(np.uint64)
+
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(bits):
+        return int(np.bitwise_count(bits).sum())
+else:
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(bits):
+        return int(_BYTE_COUNTS[bits.view(np.uint8)].sum(dtype=np.int64))
+
+
+def indexed_columns(df):
+    """Categorical columns of raw applicant rows, plus the MapReduce income/credit brackets."""
+    from rules_engine import CREDIT_BRACKETS, INCOME_BRACKETS, bracket
+
+    cols = {}
+    for col in df.columns:
+        if col in SKIP_COLUMNS or df[col].dtype.kind in 'iuf':
+            continue
+        cols[col] = df[col]
+    if 'income' in df.columns:
+        cols['income_bracket'] = bracket(df['income'], INCOME_BRACKETS)
+    if 'credit_score' in df.columns:
+        cols['credit_bracket'] = bracket(df['credit_score'], CREDIT_BRACKETS)
+    return cols
+
+
+class BitmapIndex:
+    def __init__(self, n_rows, bitmaps):
+        self.n_rows = n_rows
+        self.bitmaps = bitmaps            # {column: {value: uint64 bitset}}
+        self.n_words = -(-n_rows // 64)
+        self._all = to_bitset(np.ones(n_rows, dtype=bool))
+
+    @classmethod
+    def build(cls, df):
+        import pandas as pd
+        from rules_engine import MISSING_LABEL
+
+        bitmaps = {}
+        for col, values in indexed_columns(df).items():
+            codes, uniques = pd.factorize(values)
+            bitmaps[col] = {str(value): to_bitset(codes == k) for k, value in enumerate(uniques)}
+            if (codes < 0).any():
+                # Missing values are indexed under the same label the rules engine uses
+                missing = to_bitset(codes < 0)
+                bitmaps[col][MISSING_LABEL] = bitmaps[col].get(MISSING_LABEL, 0) | missing
+        return cls(len(df), bitmaps)
+
+    # --- Predicates ---
+    def bitmap(self, column, values):
+        """OR of the bitsets of `values` in `column`; unknown values match nothing."""
+        if column not in self.bitmaps:
+            raise KeyError(f"Column '{column}' is not indexed (indexed: {', '.join(self.bitmaps)})")
+        out = np.zeros(self.n_words, dtype=np.uint64)
+        for value in values:
+            bits = self.bitmaps[column].get(str(value))
+            if bits is not None:
+                out |= bits
+        return out
+
+    def evaluate(self, conditions):
+        """AND of [(column, op, value), ...] with op in '==', '!=', 'in', 'not in'."""
+        result = self._all.copy()
+        for column, op, value in conditions:
+            values = value if op in ('in', 'not in') else [value]
+            bits = self.bitmap(column, values)
+            if op in ('!=', 'not in'):
+                result &= ~bits & self._all
+            elif op in ('==', 'in'):
+                result &= bits
+            else:
+                raise ValueError(f"Unsupported operator '{op}' for a bitmap index")
+        return result
+
+    def count(self, conditions):
+        return popcount(self.evaluate(conditions))
+
+    def row_ids(self, conditions):
+        bits = self.evaluate(conditions).view(np.uint8)
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows, bitorder='little'))
+
+    def values(self, column):
+        return sorted(self.bitmaps[column])
+
+    # --- Persistence ---
+    def save(self, path=INDEX_FILE):
+        compressed = {col: {value: zlib.compress(bits.tobytes(), 1) for value, bits in values.items()}
+                      for col, values in self.bitmaps.items()}
+        with open(path, 'wb') as f:
+            pickle.dump({'n_rows': self.n_rows, 'bitmaps': compressed}, f)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        bitmaps = {col: {value: np.frombuffer(zlib.decompress(blob), dtype=np.uint64)
+                         for value, blob in values.items()}
+                   for col, values in data['bitmaps'].items()}
+        return cls(data['n_rows'], bitmaps)
+
+
+# --- CLI ---
+def parse_condition(text):
+    """'col=a', 'col=a|b' (any of) or 'col!=a' -> rules_engine-style condition."""
+    negate = '!=' in text
+    column, raw = text.split('!=' if negate else '=', 1)
+    values = raw.split('|')
+    if len(values) == 1:
+        return (column.strip(), '!=' if negate else '==', values[0])
+    return (column.strip(), 'not in' if negate else 'in', values)
+
+
+def pandas_mask(df, conditions):
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in conditions:
+        values = value if op in ('in', 'not in') else [value]
+        hit = df[column].isin(values).to_numpy()
+        mask &= ~hit if op in ('!=', 'not in') else hit
+    return mask
+
+
+def benchmark(rows=10_000_000, csv_file=CSV_FILE):
+    import pandas as pd
+
+    conditions = [('city_tier', '==', 'Tier 3'), ('residence_type', '==', 'Rented'), ('smoker', '==', 'Yes'),
+                  ('existing_conditions', '==', 'Diabetes'), ('underwriting_decision', '==', 'Review')]
+    base = pd.read_csv(csv_file, usecols=[c for c, _, _ in conditions])
+    df = pd.concat([base] * (rows // len(base) + 1), ignore_index=True).iloc[:rows]
+
+    start = time.perf_counter()
+    index = BitmapIndex.build(df)
+    build = time.perf_counter() - start
+    print(f"\n🏗️ Bitmap index over {rows:,} rows built in {build:.2f}s")
+
+    start = time.perf_counter()
+    expected = int(pandas_mask(df, conditions).sum())
+    scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = index.count(conditions)
+    bitmap_s = time.perf_counter() - start
+    assert got == expected, (got, expected)
+    print(f"🐼 pandas full scan: {expected:,} matches in {scan * 1000:.1f} ms")
+    print(f"🧮 bitmap AND + popcount: {got:,} matches in {bitmap_s * 1000:.1f} ms ({scan / bitmap_s:.0f}x faster)")
+
+
+def main(argv):
+    if not argv or argv[0] not in ('build', 'count', 'rows', 'bench'):
+        print("Usage: python bitmap_index.py build [csv] | count COND... | rows COND... | bench [rows]\n"
+              "       COND is col=value, col=a|b (any of) or col!=value")
+        sys.exit(1)
+
+    command, args = argv[0], argv[1:]
+    if command == 'build':
+        import pandas as pd
+
+        csv_file = args[0] if args else CSV_FILE
+        start = time.perf_counter()
+        index = BitmapIndex.build(pd.read_csv(csv_file))
+        index.save()
+        print(f"\n💾 Indexed {index.n_rows:,} rows, {sum(len(v) for v in index.bitmaps.values())} bitmaps "
+              f"over {len(index.bitmaps)} columns in {time.perf_counter() - start:.2f}s → '{INDEX_FILE}'")
+    elif command == 'bench':
+        benchmark(*(int(a) for a in args[:1]))
+    else:
+        index = BitmapIndex.load()
+        conditions = [parse_condition(a) for a in args]
+        if command == 'count':
+            n = index.count(conditions)
+            print(f"🔎 {n:,} of {index.n_rows:,} applicants match ({n / max(index.n_rows, 1):.2%})")
+        else:
+            ids = index.row_ids(conditions)
+            print(f"🔎 {len(ids):,} matching row ids: {ids[:50].tolist()}{' ...' if len(ids) > 50 else ''}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
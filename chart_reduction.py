@@ -0,0 +1,157 @@
+# chart_reduction.py
+#
+# Server-side reduction of large chart inputs, so the dashboards ship a
+# bounded number of marks to the browser whatever the size of the data:
+#   density_bins / density_scatter - 2D binned counts per class for scatter views
+#   lttb / minmax                  - index selection for time series downsampling
+#   downsample                     - a window of a time series, reduced to max_points
+# Both reductions work inside the requested axis window, so a narrower
+# window (zooming in) gives finer bins and denser samples.
+#
+# Usage:
+#   python chart_reduction.py [rows]   # benchmark on synthetic data (default 2M rows)
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# --- Config ---
+MAX_SCATTER_POINTS = 5_000     # below this the raw points are plotted
+DENSITY_BINS = 60              # per axis
+MAX_SERIES_POINTS = 1_000
+
+
+# --- 2D binned density ---
+def _bin_index(values, lo, hi, bins):
+    idx = ((values - lo) / ((hi - lo) or 1.0) * bins).astype(np.int64)
+    return np.minimum(idx, bins - 1)    # the upper edge belongs to the last bin
+
+
+def density_bins(df, x, y, color=None, x_range=None, y_range=None, bins=DENSITY_BINS):
+    """
+    Count rows per (x bin, y bin[, color]) inside the window; empty bins are dropped.
+    Returns a DataFrame with x / y bin centres, the color value and 'count'.
+    """
+    xs = df[x].to_numpy(dtype=np.float64)
+    ys = df[y].to_numpy(dtype=np.float64)
+    x_lo, x_hi = x_range if x_range is not None else (np.nanmin(xs), np.nanmax(xs))
+    y_lo, y_hi = y_range if y_range is not None else (np.nanmin(ys), np.nanmax(ys))
+
+    keep = (xs >= x_lo) & (xs <= x_hi) & (ys >= y_lo) & (ys <= y_hi)
+    cell = _bin_index(xs[keep], x_lo, x_hi, bins) * bins + _bin_index(ys[keep], y_lo, y_hi, bins)
+    if color is not None:
+        codes, labels = pd.factorize(df[color].to_numpy()[keep])
+        cell = codes.astype(np.int64) * bins * bins + cell
+    else:
+        labels = [None]
+
+    counts = np.bincount(cell, minlength=len(labels) * bins * bins)
+    nonzero = np.flatnonzero(counts)
+    label, rest = np.divmod(nonzero, bins * bins)
+    ix, iy = np.divmod(rest, bins)
+    x_step, y_step = (x_hi - x_lo) / bins, (y_hi - y_lo) / bins
+    out = pd.DataFrame({x: x_lo + (ix + 0.5) * x_step, y: y_lo + (iy + 0.5) * y_step,
+                        'count': counts[nonzero]})
+    if color is not None:
+        out[color] = np.asarray(labels, dtype=object)[label]
+    return out
+
+
+def density_scatter(df, x, y, color=None, x_range=None, y_range=None, bins=DENSITY_BINS,
+                    max_points=MAX_SCATTER_POINTS, title=None):
+    """
+    Plotly scatter of x vs y. Small windows plot the raw points; larger ones plot
+    one marker per non-empty bin, sized by its row count.
+    """
+    import plotly.express as px
+
+    window = df
+    if x_range is not None:
+        window = window[window[x].between(*x_range)]
+    if y_range is not None:
+        window = window[window[y].between(*y_range)]
+    if len(window) <= max_points:
+        return px.scatter(window, x=x, y=y, color=color, title=title)
+
+    cells = density_bins(window, x, y, color, x_range, y_range, bins)
+    title = f"{title or f'{x} vs {y}'} ({len(window):,} rows in {len(cells):,} bins)"
+    return px.scatter(cells, x=x, y=y, color=color, size='count', size_max=18,
+                      hover_data={'count': True}, title=title)
+
+
+# --- Time series downsampling (return the indices to keep, first and last always included) ---
+def minmax(y, n_out):
+    """Min and max of each of (n_out - 2) // 2 equal buckets: keeps every spike, cheapest to compute."""
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    buckets = max((n_out - 2) // 2, 1)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    # Buckets may hold no real values only at the padded tail
+    filled = ~np.isnan(padded).all(axis=1)
+    starts = np.arange(buckets)[filled] * size
+    lo = starts + np.nanargmin(padded[filled], axis=1)
+    hi = starts + np.nanargmax(padded[filled], axis=1)
+    return np.unique(np.concatenate([[0, n - 1], lo, hi]))
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: keeps the visual shape of the line with n_out points."""
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)   # n_out - 2 inner buckets
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        start, stop = edges[b], edges[b + 1]
+        nxt_start, nxt_stop = stop, (edges[b + 2] if b + 2 < len(edges) else n)
+        cx, cy = x[nxt_start:nxt_stop].mean(), y[nxt_start:nxt_stop].mean()
+        # Twice the triangle area between the last kept point, a candidate and the next bucket's mean
+        area = np.abs((x[a] - cx) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (cy - y[a]))
+        a = start + int(area.argmax())
+        keep[b + 1] = a
+    return keep
+
+
+def downsample(df, x, y, max_points=MAX_SERIES_POINTS, x_range=None, method='lttb'):
+    """Rows of df[[x, y]] inside the x window, reduced to at most max_points by `method` ('lttb' or 'minmax')."""
+    window = df[[x, y]]
+    if x_range is not None:
+        window = window[window[x].between(*x_range)]
+    window = window.dropna()
+    xs = window[x].to_numpy()
+    if np.issubdtype(xs.dtype, np.datetime64):
+        xs = xs.astype('datetime64[ns]').astype(np.int64)
+    ys = window[y].to_numpy(dtype=np.float64)
+    keep = lttb(xs, ys, max_points) if method == 'lttb' else minmax(ys, max_points)
+    return window.iloc[keep]
+
+
+# --- Benchmark ---
+def benchmark(rows=2_000_000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'credit_score': rng.normal(650, 80, rows), 'income': rng.lognormal(13, 0.6, rows),
+                       'Predicted_Churn': rng.integers(0, 2, rows).astype('int8')})
+    start = time.perf_counter()
+    cells = density_bins(df, 'credit_score', 'income', 'Predicted_Churn')
+    print(f"\n🟦 {rows:,} scatter rows → {len(cells):,} density markers in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    series = pd.DataFrame({'timestamp': pd.date_range('2024-01-01', periods=rows, freq='s'),
+                           'cpu_usage': np.clip(np.cumsum(rng.normal(0, 1, rows)) % 100, 0, 100)})
+    for method in ('lttb', 'minmax'):
+        start = time.perf_counter()
+        reduced = downsample(series, 'timestamp', 'cpu_usage', method=method)
+        print(f"📉 {method}: {rows:,} samples → {len(reduced):,} points in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark(*(int(a) for a in sys.argv[1:2]))
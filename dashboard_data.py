@@ -0,0 +1,259 @@
+# dashboard_data.py
+#
+# Shared cache of the files the dashboards read, keyed by (path, mtime, size).
+# Each file is parsed once per change on disk; widget interactions reuse the
+# parsed DataFrames and only filter them. Returned frames are shared between
+# reruns and sessions, so filter them into new frames rather than editing in place.
+# The live metrics file is tailed instead: each read parses only the lines
+# appended since the previous one.
+#
+# Usage:
+#   python dashboard_data.py [samples]   # refresh cost of the live tail vs. a full reparse
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from insurance_mapreduce import build_tidy_tables
+from mapreduce_charts import CHARTS_FILE, FIGURE_FILTERS, build_figures, spec_figure
+from bitmap_index import INDEX_FILE, BitmapIndex
+from olap_cube import CUBE_FILE, load_cube as read_cube
+
+# --- Config ---
+RESULTS_FILE = 'insurance_mapreduce_results.json'
+METRICS_FILE = 'system_metrics.json'
+LIVE_METRICS_FILE = 'system_metrics.jsonl'   # appended per sample by `monitor_runner.py --live`
+METRIC_COLUMNS = ('cpu_usage', 'memory_usage', 'disk_usage', 'cpu_temp')
+LIVE_REFRESH_SECONDS = 2
+LIVE_IDLE_SECONDS = 30       # a live file untouched this long belongs to a run that died without its end marker
+LIVE_WINDOWS = {'Last 5 minutes': timedelta(minutes=5), 'Last 15 minutes': timedelta(minutes=15),
+                'Last hour': timedelta(hours=1), 'Whole run': None}
+REFRESHES = 10   # benchmark only
+
+
+def file_key(path):
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+# --- MapReduce results ---
+@lru_cache(maxsize=8)
+def _mapreduce_results(path, mtime_ns, size):
+    with open(path) as f:
+        data = json.load(f)
+    # Results written before the job emitted tidy tables are parsed here instead
+    tables = data.get('tidy_tables') or build_tidy_tables(data['analysis_results'])
+    meta = {'timestamp': data['timestamp'], 'row_count': data['row_count']}
+    return meta, {name: pd.DataFrame(records) for name, records in tables.items()}
+
+
+def load_mapreduce_results(path=RESULTS_FILE):
+    """(meta, {'churn_by_city' | 'risk_by_health' | 'underwriting' | 'claims_by_term': DataFrame})."""
+    return _mapreduce_results(*file_key(path))
+
+
+# --- MapReduce figures (built once per results version and filter selection) ---
+@lru_cache(maxsize=64)
+def _mapreduce_figures(path, mtime_ns, size, selection, names=tuple(FIGURE_FILTERS)):
+    _, tables = _mapreduce_results(path, mtime_ns, size)
+    return build_figures(tables, dict(selection), names)
+
+
+# --- Stored chart specs (rendered by the MapReduce job, see mapreduce_charts.py) ---
+@lru_cache(maxsize=4)
+def _chart_specs(path, mtime_ns, size):
+    with open(path) as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=128)
+def _chart_figure(path, mtime_ns, size, name, selection):
+    import plotly.graph_objects as go
+
+    spec = spec_figure(_chart_specs(path, mtime_ns, size), name, dict(selection))
+    return None if spec is None else go.Figure(spec)
+
+
+def mapreduce_figures(city, reason, smoker, income, credit, term, path=RESULTS_FILE, charts_path=CHARTS_FILE):
+    """
+    The dashboard's MapReduce figures for a filter selection; shared, so don't modify them.
+    Figures come from the run's stored specs where those can express the selection,
+    and are built from the tables otherwise (or when the specs are missing or stale).
+    """
+    selection = (('city', tuple(city)), ('reason', tuple(reason)), ('smoker', smoker),
+                 ('income', tuple(income)), ('credit', tuple(credit)), ('term', tuple(term)))
+    results_key = file_key(path)
+    figs = dict.fromkeys(FIGURE_FILTERS)
+    if os.path.exists(charts_path):
+        charts_key = file_key(charts_path)
+        meta, _ = _mapreduce_results(*results_key)
+        if _chart_specs(*charts_key)['timestamp'] == meta['timestamp']:
+            figs = {name: _chart_figure(*charts_key, name, selection) for name in FIGURE_FILTERS}
+    missing = tuple(name for name, fig in figs.items() if fig is None)
+    if missing:
+        figs.update(_mapreduce_figures(*results_key, selection, missing))
+    return figs
+
+
+# --- System metrics ---
+@lru_cache(maxsize=8)
+def _system_metrics(path, mtime_ns, size):
+    with open(path) as f:
+        df = pd.DataFrame(json.load(f))
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='%H:%M:%S')
+    return df
+
+
+def load_system_metrics(path=METRICS_FILE):
+    return _system_metrics(*file_key(path))
+
+
+# --- Live system metrics (tailed by read offset) ---
+class MetricsTail:
+    """
+    Incremental reader of a JSON-lines metrics file that only grows. Samples are
+    kept in column arrays that double in capacity, so a refresh costs the lines
+    appended since the last one, not the whole run. A truncated, replaced or
+    rewritten file (a new run) starts over. The monitor's end-of-run marker
+    line sets `finished`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, inode):
+        self.inode = inode
+        self.offset = 0                # bytes consumed: always the end of a complete line
+        self.head = b""                # first line, to tell a restarted run from more of the same one
+        self.rows = 0
+        self.finished = False
+        self.timestamps = np.empty(0, dtype='datetime64[ns]')
+        self.values = {name: np.empty(0, dtype=np.float64) for name in METRIC_COLUMNS}
+
+    def _append(self, samples):
+        needed = self.rows + len(samples)
+        if needed > len(self.timestamps):
+            capacity = max(needed, 2 * len(self.timestamps), 1024)
+            self.timestamps = np.resize(self.timestamps, capacity)
+            self.values = {name: np.resize(col, capacity) for name, col in self.values.items()}
+        end = self.rows + len(samples)
+        self.timestamps[self.rows:end] = [s['timestamp'] for s in samples]
+        for name, col in self.values.items():
+            col[self.rows:end] = [np.nan if s.get(name) is None else s[name] for s in samples]
+        self.rows = end
+
+    def read(self):
+        """All samples so far as a DataFrame (timestamp + METRIC_COLUMNS); shared, so don't modify it."""
+        with self._lock:
+            st = os.stat(self.path)
+            if st.st_ino != self.inode or st.st_size < self.offset:
+                self._reset(st.st_ino)
+            if st.st_size > self.offset or self.head:
+                with open(self.path, 'rb') as f:
+                    if self.head and f.read(len(self.head)) != self.head:
+                        self._reset(st.st_ino)
+                    f.seek(self.offset)
+                    chunk = f.read(st.st_size - self.offset)
+                # A line still being written stays unread until its newline arrives
+                complete = chunk[:chunk.rfind(b"\n") + 1]
+                if not self.head:
+                    self.head = complete[:complete.find(b"\n") + 1]
+                self.offset += len(complete)
+                samples = [json.loads(line) for line in complete.splitlines() if line.strip()]
+                if samples and samples[-1].get('event') == 'end':
+                    self.finished = True
+                    samples.pop()
+                if samples:
+                    self._append(samples)
+            # Views of the filled part: later appends write past them, regrowth allocates new arrays
+            columns = {'timestamp': self.timestamps[:self.rows]}
+            columns.update((name, col[:self.rows]) for name, col in self.values.items())
+            return pd.DataFrame(columns, copy=False)
+
+
+_tails = {}
+_tails_lock = threading.Lock()
+
+
+def _tail(path):
+    with _tails_lock:
+        key = os.path.abspath(path)
+        if key not in _tails:
+            _tails[key] = MetricsTail(key)
+        return _tails[key]
+
+
+def load_live_metrics(path=LIVE_METRICS_FILE):
+    """Samples of the running job's live metrics file, parsing only what was appended since the last call."""
+    return _tail(path).read()
+
+
+def live_run_finished(path=LIVE_METRICS_FILE, idle_seconds=LIVE_IDLE_SECONDS):
+    """
+    Whether the live run is over, as of the last load_live_metrics: it wrote its
+    end marker, or its file has not changed for idle_seconds (the run was killed).
+    """
+    return _tail(path).finished or time.time() - os.stat(path).st_mtime > idle_seconds
+
+
+# --- OLAP cube ---
+@lru_cache(maxsize=4)
+def _cube(path, mtime_ns, size):
+    return read_cube(path)
+
+
+def load_cube(path=CUBE_FILE):
+    return _cube(*file_key(path))
+
+
+# --- Bitmap index ---
+@lru_cache(maxsize=2)
+def _bitmap_index(path, mtime_ns, size):
+    return BitmapIndex.load(path)
+
+
+def load_bitmap_index(path=INDEX_FILE):
+    return _bitmap_index(*file_key(path))
+
+
+# --- Benchmark ---
+def benchmark(samples=300_000):
+    """Refresh cost of the live tail after a few new samples, against reparsing the whole file."""
+    path = os.path.join(tempfile.mkdtemp(), LIVE_METRICS_FILE)
+    start = np.datetime64('2024-01-01T00:00:00')
+    line = lambda i: json.dumps({'timestamp': str(start + i), 'cpu_usage': i % 100, 'memory_usage': 50.0,
+                                 'disk_usage': 70.0, 'cpu_temp': None}) + "\n"
+    with open(path, 'w') as f:
+        f.writelines(line(i) for i in range(samples))
+
+    tail = MetricsTail(path)
+    t = time.perf_counter()
+    tail.read()
+    print(f"\n📥 First read of {samples:,} samples: {(time.perf_counter() - t) * 1000:.1f} ms")
+    refreshes = []
+    for r in range(REFRESHES):
+        with open(path, 'a') as f:
+            f.writelines(line(samples + 2 * r + i) for i in range(2))
+        t = time.perf_counter()
+        df = tail.read()
+        refreshes.append(time.perf_counter() - t)
+    print(f"🔁 Refresh after 2 new samples (tail): median {np.median(refreshes) * 1000:.2f} ms "
+          f"over {REFRESHES} refreshes, {len(df):,} rows")
+    t = time.perf_counter()
+    with open(path) as f:
+        full = pd.DataFrame([json.loads(l) for l in f])
+    print(f"🐢 Refresh by reparsing the whole file: {(time.perf_counter() - t) * 1000:.1f} ms, {len(full):,} rows")
+
+
+if __name__ == "__main__":
+    benchmark(*(int(a) for a in sys.argv[1:2]))
@@ -3,11 +3,14 @@
 import pandas as pd
 import numpy as np
 import random
+import sys
+from rules_engine import CHURN_SCORE_RULES, score_points
 
 random.seed(42)
 np.random.seed(42)
 
-N = 4000
+# Row count; pass a larger value (e.g. `python dataset.py 1000000`) for scale tests
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
 
 # Feature generation
 data = {
@@ -38,20 +41,11 @@ data = {
 
 df = pd.DataFrame(data)
 
-# Logical churn assignment
-def generate_churn(row):
-    score = 0
-    if row['credit_score'] < 500: score += 1
-    if row['smoker'] == 'Yes': score += 1
-    if row['existing_conditions'] != 'None': score += 1
-    if row['income'] < 300000: score += 1
-    if row['risk_aversion_score'] < 4: score += 1
-    if row['internet_usage_hours'] < 2: score += 1
-    if row['phone_contact_frequency'] < 5: score += 1
-    if row['city_tier'] == 'Tier 3': score += 1
-    return 1 if score >= 3 else 0
+# Logical churn assignment: 3+ risk points from the shared rule set
+def generate_churn(df):
+    return (score_points(df, CHURN_SCORE_RULES) >= 3).astype(int)
 
-df['Churn'] = df.apply(generate_churn, axis=1)
+df['Churn'] = generate_churn(df)
 
 # Inject noise in 10% of labels
 flip_indices = df.sample(frac=0.10, random_state=99).index
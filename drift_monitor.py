@@ -0,0 +1,179 @@
+# drift_monitor.py
+#
+# Streaming feature drift monitor for scored traffic.
+# Each feature keeps a fixed-size histogram over bins taken from the training
+# reference profile, so memory does not grow with traffic and the hot path
+# costs one bincount per feature over a strided sample of the batch. Every
+# `window_size` scored rows the window is compared to the reference (PSI and
+# binned KS) and appended as JSON lines to DRIFT_FILE for the dashboards.
+# Both files live in the model directory, next to the artifacts they describe.
+# batch_score.py and the scoring gateway feed the monitor; prediction.py scores
+# one applicant per process and carries the open window over in DRIFT_WINDOW_FILE.
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+# --- Config ---
+REFERENCE_PROFILE_FILE = "reference_profile.json"
+DRIFT_FILE = "drift_metrics.jsonl"
+DRIFT_WINDOW_FILE = "drift_window.json"
+NUMERIC_BINS = 10
+WINDOW_SIZE = 10_000
+SAMPLE_EVERY = 4           # histogram every 4th row; proportions need a sample, not every row
+PSI_EPSILON = 1e-4
+PSI_ALERT = 0.2            # common rule of thumb: > 0.2 is significant drift
+
+
+# --- Reference profile (written at training time) ---
+def build_reference_profile(X, categorical_columns=(), model_version=None):
+    """
+    Bin edges and reference proportions per feature of the encoded training matrix.
+    Label-encoded columns get one bin per code; numerics get quantile bins.
+    """
+    features = {}
+    for col in X.columns:
+        values = np.asarray(X[col], dtype=np.float64)
+        if col in categorical_columns:
+            edges = np.arange(int(np.nanmax(values))) + 0.5
+        else:
+            edges = np.unique(np.nanquantile(values, np.linspace(0, 1, NUMERIC_BINS + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+        features[col] = {
+            'categorical': col in categorical_columns,
+            'edges': edges.tolist(),
+            'proportions': (counts / max(counts.sum(), 1)).tolist(),
+        }
+    return {'model_version': model_version, 'rows': len(X), 'features': features}
+
+
+def save_reference_profile(profile, path=REFERENCE_PROFILE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_reference_profile(path=REFERENCE_PROFILE_FILE):
+    with open(path) as f:
+        return json.load(f)
+
+
+# --- Drift statistics ---
+def psi(expected, actual):
+    e = np.clip(expected, PSI_EPSILON, None)
+    a = np.clip(actual, PSI_EPSILON, None)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def binned_ks(expected, actual):
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual))))
+
+
+# --- Monitor ---
+class DriftMonitor:
+    def __init__(self, profile=None, window_size=WINDOW_SIZE, output_path=DRIFT_FILE, sample_every=SAMPLE_EVERY):
+        profile = profile or load_reference_profile()
+        self.features = list(profile['features'])
+        self.categorical = [profile['features'][f].get('categorical', False) for f in self.features]
+        self.edges = [np.asarray(profile['features'][f]['edges'], dtype=np.float32) for f in self.features]
+        self.expected = [np.asarray(profile['features'][f]['proportions']) for f in self.features]
+        self.window_size = window_size
+        self.sample_every = sample_every
+        self.output_path = output_path
+        self._reset()
+
+    def _reset(self):
+        self.counts = [np.zeros(len(e) + 1, dtype=np.int64) for e in self.edges]
+        self.rows = 0
+
+    def bin_counts(self, X, columns=None):
+        """
+        Histogram counts of a batch; cheap, and safe to compute in worker processes.
+        X is an encoded feature frame, or a matrix whose columns are named by `columns`
+        (default: the profile's features, in order).
+        """
+        if hasattr(X, 'columns'):
+            columns, X = list(X.columns), X.to_numpy()
+        columns = self.features if columns is None else list(columns)
+        missing = [f for f in self.features if f not in columns]
+        if missing or len(columns) != np.shape(X)[1]:
+            raise ValueError(f"Batch does not match the reference profile's features (missing {missing})")
+        order = [columns.index(f) for f in self.features]
+        sample = np.asarray(X, dtype=np.float32)[::self.sample_every]
+        sample = sample if order == list(range(len(order))) else sample[:, order]
+        counts = []
+        for j, (edges, categorical) in enumerate(zip(self.edges, self.categorical)):
+            if categorical:
+                # Label codes are already bin numbers
+                bins = np.clip(sample[:, j].astype(np.intp), 0, len(edges))
+            else:
+                bins = np.searchsorted(edges, sample[:, j], side='right')
+            counts.append(np.bincount(bins, minlength=len(edges) + 1))
+        return counts
+
+    def add_counts(self, counts, rows):
+        for total, batch in zip(self.counts, counts):
+            total += batch
+        self.rows += rows
+        if self.rows >= self.window_size:
+            self.flush()
+
+    def observe(self, X, columns=None):
+        self.add_counts(self.bin_counts(X, columns), len(X))
+
+    # --- Open window across processes ---
+    def save_window(self, path):
+        """Persist the open window, so short-lived scorers add up to full windows."""
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, 'w') as f:
+            json.dump({'features': self.features, 'rows': self.rows, 'counts': [c.tolist() for c in self.counts]}, f)
+        os.replace(tmp, path)
+
+    def load_window(self, path):
+        """Resume a window saved by save_window; a window saved for other features is dropped."""
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            saved = json.load(f)
+        if saved['features'] == self.features and [len(c) for c in saved['counts']] == [len(c) for c in self.counts]:
+            self.counts = [np.asarray(c, dtype=np.int64) for c in saved['counts']]
+            self.rows = saved['rows']
+
+    def window_stats(self):
+        stats = []
+        for feature, counts, expected in zip(self.features, self.counts, self.expected):
+            actual = counts / max(counts.sum(), 1)
+            stats.append({'feature': feature, 'psi': round(psi(expected, actual), 5),
+                          'ks': round(binned_ks(expected, actual), 5)})
+        return stats
+
+    def flush(self):
+        """Write the current window (if any rows) and start a new one."""
+        if self.rows == 0:
+            return []
+        window_end = datetime.now().isoformat(timespec='seconds')
+        records = [{'window_end': window_end, 'rows': self.rows, **s,
+                    'alert': s['psi'] > PSI_ALERT} for s in self.window_stats()]
+        with open(self.output_path, 'a') as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        self._reset()
+        return records
+
+
+def open_monitor(model_dir=".", **kwargs):
+    """DriftMonitor for the model published in model_dir, writing next to it; None without a reference profile."""
+    profile_path = os.path.join(model_dir, REFERENCE_PROFILE_FILE)
+    if not os.path.exists(profile_path):
+        return None
+    return DriftMonitor(load_reference_profile(profile_path), output_path=os.path.join(model_dir, DRIFT_FILE), **kwargs)
+
+
+def load_drift_metrics(path=DRIFT_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
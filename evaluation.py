@@ -0,0 +1,185 @@
+# evaluation.py
+#
+# Mergeable evaluation accumulators for streamed churn predictions.
+# An accumulator holds only fixed-size counts: the confusion matrix at the
+# decision threshold, the log-loss sum, and per-class histograms of the
+# predicted probability (from which calibration and the ROC curve are read).
+# Update it per chunk, merge the accumulators of several workers, and report
+# metrics at any point without keeping labels or predictions around.
+#
+# Usage:
+#   python evaluation.py [applicants.csv] [chunk_rows]   # streamed metrics vs. sklearn on the full arrays
+
+import json
+import os
+import sys
+
+import numpy as np
+
+# --- Config ---
+THRESHOLD = 0.5            # same cut-off as Predicted_Churn
+PROBA_BINS = 100           # probability histogram resolution (calibration and ROC)
+LOG_LOSS_EPS = 1e-15
+EVALUATION_FILE = "evaluation_metrics.json"
+
+
+class EvaluationAccumulator:
+    def __init__(self, bins=PROBA_BINS, threshold=THRESHOLD):
+        self.bins = bins
+        self.threshold = threshold
+        self.confusion = np.zeros((2, 2), dtype=np.int64)      # [actual, predicted]
+        self.log_loss_sum = 0.0
+        self.hist = np.zeros((2, bins), dtype=np.int64)       # rows per (actual class, probability bin)
+        self.proba_sum = np.zeros(bins, dtype=np.float64)      # sum of predicted probability per bin
+
+    @property
+    def rows(self):
+        return int(self.confusion.sum())
+
+    # --- Updating ---
+    def update(self, y_true, proba):
+        """Add a chunk of 0/1 labels and churn probabilities; returns self."""
+        y = np.asarray(y_true, dtype=np.int64)
+        p = np.asarray(proba, dtype=np.float64)
+        predicted = (p > self.threshold).astype(np.int64)
+        self.confusion += np.bincount(y * 2 + predicted, minlength=4).reshape(2, 2)
+
+        clipped = np.clip(p, LOG_LOSS_EPS, 1 - LOG_LOSS_EPS)
+        self.log_loss_sum -= float(np.sum(np.where(y == 1, np.log(clipped), np.log1p(-clipped))))
+
+        b = np.minimum((p * self.bins).astype(np.int64), self.bins - 1)
+        self.hist += np.bincount(y * self.bins + b, minlength=2 * self.bins).reshape(2, self.bins)
+        self.proba_sum += np.bincount(b, weights=p, minlength=self.bins)
+        return self
+
+    def merge(self, other):
+        """Fold another accumulator (e.g. from a worker) into this one; returns self."""
+        if (other.bins, other.threshold) != (self.bins, self.threshold):
+            raise ValueError("Cannot merge accumulators with different bins or threshold")
+        self.confusion += other.confusion
+        self.log_loss_sum += other.log_loss_sum
+        self.hist += other.hist
+        self.proba_sum += other.proba_sum
+        return self
+
+    # --- Metrics ---
+    def confusion_matrix(self):
+        return self.confusion.copy()
+
+    def classification_report(self):
+        """Same layout as sklearn's classification_report(output_dict=True) for labels 0 and 1."""
+        report = {}
+        support = self.confusion.sum(axis=1)
+        for label in (0, 1):
+            tp = self.confusion[label, label]
+            predicted = self.confusion[:, label].sum()
+            precision = tp / predicted if predicted else 0.0
+            recall = tp / support[label] if support[label] else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            report[str(label)] = {'precision': float(precision), 'recall': float(recall),
+                                  'f1-score': float(f1), 'support': float(support[label])}
+        report['accuracy'] = float(np.trace(self.confusion) / max(self.rows, 1))
+        for name, weights in (('macro avg', np.ones(2)), ('weighted avg', support)):
+            weights = weights / max(weights.sum(), 1)
+            report[name] = {metric: float(sum(w * report[str(label)][metric] for label, w in enumerate(weights)))
+                            for metric in ('precision', 'recall', 'f1-score')}
+            report[name]['support'] = float(self.rows)
+        return report
+
+    def log_loss(self):
+        return self.log_loss_sum / max(self.rows, 1)
+
+    def calibration(self):
+        """Per non-empty probability bin: mean predicted probability, observed churn rate and row count."""
+        counts = self.hist.sum(axis=0)
+        filled = np.flatnonzero(counts)
+        return {
+            'bin_lower': (filled / self.bins).tolist(),
+            'mean_predicted': (self.proba_sum[filled] / counts[filled]).tolist(),
+            'observed_rate': (self.hist[1, filled] / counts[filled]).tolist(),
+            'count': counts[filled].tolist(),
+        }
+
+    def roc_curve(self):
+        """(fpr, tpr, thresholds) with one point per bin edge, from the strictest threshold down."""
+        positives = np.concatenate([[0], np.cumsum(self.hist[1, ::-1])])
+        negatives = np.concatenate([[0], np.cumsum(self.hist[0, ::-1])])
+        thresholds = np.arange(self.bins, -1, -1) / self.bins
+        tpr = positives / max(positives[-1], 1)
+        fpr = negatives / max(negatives[-1], 1)
+        return fpr, tpr, thresholds
+
+    def roc_auc(self):
+        """Area under the binned ROC curve (ties within a bin count half, as in the exact AUC)."""
+        fpr, tpr, _ = self.roc_curve()
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+    def summary(self):
+        report = self.classification_report()
+        return {
+            'rows': self.rows,
+            'accuracy': report['accuracy'],
+            'precision': report['1']['precision'],
+            'recall': report['1']['recall'],
+            'f1': report['1']['f1-score'],
+            'log_loss': self.log_loss(),
+            'roc_auc': self.roc_auc(),
+        }
+
+    # --- Serialization (JSON-safe, for reports and for shipping between processes) ---
+    def to_dict(self):
+        return {'bins': self.bins, 'threshold': self.threshold, 'confusion': self.confusion.tolist(),
+                'log_loss_sum': self.log_loss_sum, 'hist': self.hist.tolist(), 'proba_sum': self.proba_sum.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        acc = cls(data['bins'], data['threshold'])
+        acc.confusion = np.asarray(data['confusion'], dtype=np.int64)
+        acc.log_loss_sum = float(data['log_loss_sum'])
+        acc.hist = np.asarray(data['hist'], dtype=np.int64)
+        acc.proba_sum = np.asarray(data['proba_sum'], dtype=np.float64)
+        return acc
+
+
+def save_evaluation(acc, path=EVALUATION_FILE, **extra):
+    """Write the summary, report, calibration and raw counts as JSON (atomically)."""
+    data = {**extra, 'summary': acc.summary(), 'classification_report': acc.classification_report(),
+            'calibration': acc.calibration(), 'accumulator': acc.to_dict()}
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+# --- Check against sklearn ---
+def main(csv_file='combined_life_insurance_with_churn_reason.csv', chunk_rows=500):
+    import pandas as pd
+    from sklearn.metrics import classification_report, confusion_matrix, log_loss, roc_auc_score
+
+    from model_registry import get_registry
+
+    bundle = get_registry().get()
+    df = pd.read_csv(csv_file)
+    y = df['Churn'].to_numpy()
+    proba = bundle.predict_proba(bundle.encode_matrix(df))
+
+    # Two "workers" each see every other chunk, then merge
+    workers = [EvaluationAccumulator(), EvaluationAccumulator()]
+    for i, start in enumerate(range(0, len(df), chunk_rows)):
+        workers[i % 2].update(y[start:start + chunk_rows], proba[start:start + chunk_rows])
+    acc = workers[0].merge(workers[1])
+
+    expected = classification_report(y, (proba > THRESHOLD).astype(int), output_dict=True)
+    got = acc.classification_report()
+    worst = max(abs(got[k][m] - expected[k][m]) for k in ('0', '1', 'macro avg', 'weighted avg')
+                for m in ('precision', 'recall', 'f1-score'))
+    print(f"\n📏 {acc.rows:,} rows in {-(-len(df) // chunk_rows)} chunks over 2 merged accumulators")
+    print(f"🧮 Confusion matrix equal to sklearn: {np.array_equal(acc.confusion_matrix(), confusion_matrix(y, proba > THRESHOLD))}")
+    print(f"🧠 Classification report max abs diff vs sklearn: {worst:.2e}")
+    print(f"📉 Log loss {acc.log_loss():.6f} (sklearn {log_loss(y, proba):.6f})")
+    print(f"📈 ROC AUC {acc.roc_auc():.4f} binned vs {roc_auc_score(y, proba):.4f} exact ({PROBA_BINS} bins)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(*args[:1], *(int(a) for a in args[1:2]))
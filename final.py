@@ -1,217 +1,276 @@
+# Charting and ML libraries are imported inside the tab (or branch) that uses
+# them, so a cold start only pays for the view being rendered
+# (python import_budget.py final.py checks the import-time budget)
+import os
+import time
 import streamlit as st
 import pandas as pd
-import json
-import altair as alt
-import plotly.express as px
-import plotly.graph_objects as go
-import seaborn as sns
-import matplotlib.pyplot as plt
-import pickle
-from sklearn.metrics import classification_report, confusion_matrix
+from dashboard_data import (LIVE_METRICS_FILE, LIVE_REFRESH_SECONDS, LIVE_WINDOWS, load_bitmap_index, load_cube,
+                            live_run_finished, load_live_metrics, load_mapreduce_results, load_system_metrics,
+                            mapreduce_figures)
+from bitmap_index import INDEX_FILE
+from chart_reduction import density_scatter, downsample
+from olap_cube import CUBE_FILE, DIMENSIONS, query
 
 # Setup
 st.set_page_config(page_title="Insurance AI Dashboard", layout="wide")
 st.title("📊 Unified Insurance Analytics Dashboard")
 
 # --- Tabs for Navigation ---
-tab1, tab2, tab3 = st.tabs(["📈 System Monitor", "🧭 MapReduce Insights", "🤖 Underwriting ML"])
+# Only the open tab runs: switching tabs reruns the script, and the hidden tabs
+# skip their data loading and figure building
+tab1, tab2, tab3 = st.tabs(["📈 System Monitor", "🧭 MapReduce Insights", "🤖 Underwriting ML"],
+                           key="active_tab", on_change="rerun")
 
 # ------------------------------
 # 🔧 TAB 1: System Monitor
 # ------------------------------
 with tab1:
-    st.header("📈 System Performance During MapReduce Execution")
-    try:
-        with open("system_metrics.json", "r") as f:
-            data = json.load(f)
-        df = pd.DataFrame(data)
-        df['timestamp'] = pd.to_datetime(df['timestamp'], format='%H:%M:%S')
+    if tab1.open:
+        import altair as alt
 
+        st.header("📈 System Performance During MapReduce Execution")
         st.sidebar.header("🔧 System Monitor Controls")
-        metric_selected = st.sidebar.multiselect("Select Metrics to View", ['CPU Usage', 'Memory Usage', 'Disk Usage', 'CPU Temperature'], default=['CPU Usage', 'Memory Usage'])
-
-        if 'CPU Usage' in metric_selected:
-            st.subheader("🔥 CPU Usage Over Time")
-            st.altair_chart(alt.Chart(df).mark_line().encode(
-                x='timestamp:T', y='cpu_usage:Q', tooltip=['timestamp:T', 'cpu_usage:Q']
-            ).interactive(), use_container_width=True)
-
-        if 'Memory Usage' in metric_selected:
-            st.subheader("🧠 Memory Usage Over Time")
-            st.altair_chart(alt.Chart(df).mark_line(color='green').encode(
-                x='timestamp:T', y='memory_usage:Q', tooltip=['timestamp:T', 'memory_usage:Q']
-            ).interactive(), use_container_width=True)
-
-        if 'Disk Usage' in metric_selected:
-            st.subheader("💾 Disk Usage Over Time")
-            st.altair_chart(alt.Chart(df).mark_line(color='purple').encode(
-                x='timestamp:T', y='disk_usage:Q', tooltip=['timestamp:T', 'disk_usage:Q']
-            ).interactive(), use_container_width=True)
-
-        if 'CPU Temperature' in metric_selected:
-            st.subheader("🌡️ CPU Temperature Over Time (Simulated)")
-            st.altair_chart(alt.Chart(df).mark_line(color='red').encode(
-                x='timestamp:T', y='cpu_temp:Q', tooltip=['timestamp:T', 'cpu_temp:Q']
-            ).interactive(), use_container_width=True)
-
-        st.caption("Note: Temperature is simulated based on CPU load.")
-    except FileNotFoundError:
-        st.error("system_metrics.json not found. Please run your job with monitoring enabled.")
+        live = st.sidebar.toggle(f"🔴 Live (tail {LIVE_METRICS_FILE})", value=os.path.exists(LIVE_METRICS_FILE))
+        try:
+            # Saved run: parsed once per change of the file, shared across reruns.
+            # Live (`monitor_runner.py --live`): each refresh parses only the newly appended samples
+            df = load_live_metrics() if live else load_system_metrics()
+            if df.empty:
+                if live_run_finished():
+                    st.info("The live run finished without samples.")
+                    st.stop()
+                st.info("⏳ Waiting for the first samples...")
+                time.sleep(LIVE_REFRESH_SECONDS)
+                st.rerun()
+
+            metric_selected = st.sidebar.multiselect("Select Metrics to View", ['CPU Usage', 'Memory Usage', 'Disk Usage', 'CPU Temperature'], default=['CPU Usage', 'Memory Usage'])
+            # Each chart gets at most MAX_SERIES_POINTS samples from the selected window
+            start, end = df['timestamp'].min().to_pydatetime(), df['timestamp'].max().to_pydatetime()
+            if live:
+                span = LIVE_WINDOWS[st.sidebar.selectbox("Show", list(LIVE_WINDOWS))]
+                window = (max(start, end - span), end) if span else None
+            else:
+                window = st.sidebar.slider("Time window", start, end, (start, end), format="HH:mm:ss") if start < end else None
+            method = st.sidebar.radio("Downsampling", ['lttb', 'minmax'], horizontal=True)
+
+            if 'CPU Usage' in metric_selected:
+                st.subheader("🔥 CPU Usage Over Time")
+                st.altair_chart(alt.Chart(downsample(df, 'timestamp', 'cpu_usage', x_range=window, method=method)).mark_line().encode(
+                    x='timestamp:T', y='cpu_usage:Q', tooltip=['timestamp:T', 'cpu_usage:Q']
+                ).interactive(), use_container_width=True)
+
+            if 'Memory Usage' in metric_selected:
+                st.subheader("🧠 Memory Usage Over Time")
+                st.altair_chart(alt.Chart(downsample(df, 'timestamp', 'memory_usage', x_range=window, method=method)).mark_line(color='green').encode(
+                    x='timestamp:T', y='memory_usage:Q', tooltip=['timestamp:T', 'memory_usage:Q']
+                ).interactive(), use_container_width=True)
+
+            if 'Disk Usage' in metric_selected:
+                st.subheader("💾 Disk Usage Over Time")
+                st.altair_chart(alt.Chart(downsample(df, 'timestamp', 'disk_usage', x_range=window, method=method)).mark_line(color='purple').encode(
+                    x='timestamp:T', y='disk_usage:Q', tooltip=['timestamp:T', 'disk_usage:Q']
+                ).interactive(), use_container_width=True)
+
+            if 'CPU Temperature' in metric_selected:
+                st.subheader("🌡️ CPU Temperature Over Time (Simulated)")
+                st.altair_chart(alt.Chart(downsample(df, 'timestamp', 'cpu_temp', x_range=window, method=method)).mark_line(color='red').encode(
+                    x='timestamp:T', y='cpu_temp:Q', tooltip=['timestamp:T', 'cpu_temp:Q']
+                ).interactive(), use_container_width=True)
+
+            st.caption("Note: Temperature is simulated based on CPU load.")
+        except FileNotFoundError:
+            st.error(f"{LIVE_METRICS_FILE if live else 'system_metrics.json'} not found. Please run your job with monitoring enabled.")
+        else:
+            # Poll for new samples only while the live run is still going
+            if live and live_run_finished():
+                st.caption(f"{len(df):,} samples | run finished")
+            elif live:
+                st.caption(f"{len(df):,} samples | refreshing every {LIVE_REFRESH_SECONDS}s")
+                time.sleep(LIVE_REFRESH_SECONDS)
+                st.rerun()
 
 # ------------------------------
 # 📊 TAB 2: MapReduce Results
 # ------------------------------
 with tab2:
-    st.header("🧭 Insurance Underwriting MapReduce Analysis")
-    def load_results():
+    if tab2.open:
+        st.header("🧭 Insurance Underwriting MapReduce Analysis")
+        def load_results():
+            # Tidy tables emitted by the MapReduce job, cached until the results file changes
+            try:
+                return load_mapreduce_results()
+            except Exception as e:
+                st.error(f"Failed to load results: {e}")
+                return None, None
+
+        results_data, tables = load_results()
+        if results_data:
+            st.markdown(f"**📅 Timestamp:** {results_data['timestamp']} | **🔢 Rows Processed:** {results_data['row_count']:,}")
+            st.markdown("---")
+
+            st.sidebar.header("🧭 MapReduce Dashboard Controls")
+
+            # Filter options come from the cached tables. The figures are read from the run's stored chart
+            # specs where those can express the selection, else built from the tables (cached either way)
+            churn_df, risk_df = tables["churn_by_city"], tables["risk_by_health"]
+            uw_df, claims_df = tables["underwriting"], tables["claims_by_term"]
+            city_sel = st.sidebar.multiselect("City Tier", churn_df["City Tier"].unique(), default=list(churn_df["City Tier"].unique()))
+            reason_sel = st.sidebar.multiselect("Churn Reason", churn_df["Churn Reason"].unique(), default=list(churn_df["Churn Reason"].unique()))
+            smoker_sel = st.sidebar.radio("Smoker Type", risk_df["Smoker"].unique())
+            inc_sel = st.sidebar.multiselect("Income Bracket", uw_df["Income Bracket"].unique(), default=list(uw_df["Income Bracket"].unique()))
+            cred_sel = st.sidebar.multiselect("Credit Score Bracket", uw_df["Credit Bracket"].unique(), default=list(uw_df["Credit Bracket"].unique()))
+            term_sel = st.sidebar.slider("Policy Term Filter", min_value=int(claims_df["Policy Term (Years)"].min()),
+                                         max_value=int(claims_df["Policy Term (Years)"].max()),
+                                         value=(int(claims_df["Policy Term (Years)"].min()), int(claims_df["Policy Term (Years)"].max())))
+            figs = mapreduce_figures(city_sel, reason_sel, smoker_sel, inc_sel, cred_sel, term_sel)
+
+            st.subheader("1️⃣ Churn Reason by City Tier")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(figs['churn_bar'], use_container_width=True)
+            with col2:
+                st.plotly_chart(figs['churn_sunburst'], use_container_width=True)
+
+            st.subheader("2️⃣ Risk Score by Smoker & Conditions")
+            col3, col4 = st.columns(2)
+            with col3:
+                st.plotly_chart(figs['risk_bar'], use_container_width=True)
+            with col4:
+                st.plotly_chart(figs['risk_pie'], use_container_width=True)
+
+            st.subheader("3️⃣ Underwriting by Income & Credit Score")
+            col5, col6 = st.columns(2)
+            with col5:
+                st.plotly_chart(figs['uw_bar'], use_container_width=True)
+            with col6:
+                st.plotly_chart(figs['uw_treemap'], use_container_width=True)
+
+            st.subheader("4️⃣ Claims by Policy Term")
+            col7, col8 = st.columns(2)
+            with col7:
+                st.plotly_chart(figs['claims_line'], use_container_width=True)
+            with col8:
+                st.plotly_chart(figs['claims_avg'], use_container_width=True)
+
+        # Any roll-up / slice, answered from the pre-aggregated cube (python olap_cube.py)
+        st.subheader("🧊 Cube Explorer")
         try:
-            with open("insurance_mapreduce_results.json") as f:
-                return json.load(f)
-        except Exception as e:
-            st.error(f"Failed to load results: {e}")
-            return None
-
-    results_data = load_results()
-    if results_data:
-        results = results_data["analysis_results"]
-        st.markdown(f"**📅 Timestamp:** {results_data['timestamp']} | **🔢 Rows Processed:** {results_data['row_count']:,}")
-        st.markdown("---")
-
-        st.sidebar.header("🧭 MapReduce Dashboard Controls")
-
-        # Churn by City
-        churn_data = []
-        for k, v in results.items():
-            if k.startswith("churn_by_city_"):
-                *_, city, reason = k.split("_")
-                churn_data.append({"City Tier": city, "Churn Reason": reason, "Count": v})
-        churn_df = pd.DataFrame(churn_data)
-        city_sel = st.sidebar.multiselect("City Tier", churn_df["City Tier"].unique(), default=list(churn_df["City Tier"].unique()))
-        reason_sel = st.sidebar.multiselect("Churn Reason", churn_df["Churn Reason"].unique(), default=list(churn_df["Churn Reason"].unique()))
-        churn_df = churn_df[churn_df["City Tier"].isin(city_sel) & churn_df["Churn Reason"].isin(reason_sel)]
-
-        st.subheader("1️⃣ Churn Reason by City Tier")
-        col1, col2 = st.columns(2)
-        with col1:
-            st.plotly_chart(px.bar(churn_df, x="City Tier", y="Count", color="Churn Reason", barmode="group"), use_container_width=True)
-        with col2:
-            st.plotly_chart(px.sunburst(churn_df, path=["City Tier", "Churn Reason"], values="Count"), use_container_width=True)
-
-        # Risk Score
-        risk_data = []
-        for k, v in results.items():
-            if k.startswith("risk_by_health_"):
-                _, _, smoker, cond = k.split("_", 3)
-                risk_data.append({"Smoker": smoker, "Condition": cond, "Average Risk Score": v})
-        risk_df = pd.DataFrame(risk_data)
-        smoker_sel = st.sidebar.radio("Smoker Type", risk_df["Smoker"].unique())
-        risk_df = risk_df[risk_df["Smoker"] == smoker_sel]
-
-        st.subheader("2️⃣ Risk Score by Smoker & Conditions")
-        col3, col4 = st.columns(2)
-        with col3:
-            st.plotly_chart(px.bar(risk_df, x="Condition", y="Average Risk Score", color="Condition"), use_container_width=True)
-        with col4:
-            st.plotly_chart(px.pie(risk_df, names="Condition", values="Average Risk Score"), use_container_width=True)
-
-        # Underwriting Decisions
-        uw_data = []
-        for k, v in results.items():
-            if k.startswith("underwriting_"):
-                _, inc, cred, dec = k.split("_", 3)
-                uw_data.append({"Income Bracket": inc, "Credit Bracket": cred, "Decision": dec.capitalize(), "Count": v})
-        uw_df = pd.DataFrame(uw_data)
-        inc_sel = st.sidebar.multiselect("Income Bracket", uw_df["Income Bracket"].unique(), default=list(uw_df["Income Bracket"].unique()))
-        cred_sel = st.sidebar.multiselect("Credit Score Bracket", uw_df["Credit Bracket"].unique(), default=list(uw_df["Credit Bracket"].unique()))
-        uw_df = uw_df[(uw_df["Income Bracket"].isin(inc_sel)) & (uw_df["Credit Bracket"].isin(cred_sel))]
-
-        st.subheader("3️⃣ Underwriting by Income & Credit Score")
-        col5, col6 = st.columns(2)
-        with col5:
-            st.plotly_chart(px.bar(uw_df, x="Income Bracket", y="Count", color="Decision", facet_col="Credit Bracket"), use_container_width=True)
-        with col6:
-            st.plotly_chart(px.treemap(uw_df, path=["Credit Bracket", "Income Bracket", "Decision"], values="Count"), use_container_width=True)
-
-        # Claims by Policy Term
-        claims_data = []
-        for k, v in results.items():
-            if k.startswith("claims_by_term_"):
-                term = int(k.split("_")[-1])
-                claims_data.append({"Policy Term (Years)": term, "Total Claims": v["total_claims"], "Average Claims": v["average_claims"]})
-        claims_df = pd.DataFrame(claims_data).sort_values("Policy Term (Years)")
-        term_min, term_max = st.sidebar.slider("Policy Term Filter", min_value=int(claims_df["Policy Term (Years)"].min()),
-                                               max_value=int(claims_df["Policy Term (Years)"].max()),
-                                               value=(int(claims_df["Policy Term (Years)"].min()), int(claims_df["Policy Term (Years)"].max())))
-        claims_df = claims_df[(claims_df["Policy Term (Years)"] >= term_min) & (claims_df["Policy Term (Years)"] <= term_max)]
-
-        st.subheader("4️⃣ Claims by Policy Term")
-        col7, col8 = st.columns(2)
-        with col7:
-            st.plotly_chart(px.line(claims_df, x="Policy Term (Years)", y="Total Claims", markers=True), use_container_width=True)
-        with col8:
-            fig8 = go.Figure()
-            fig8.add_trace(go.Bar(x=claims_df["Policy Term (Years)"], y=claims_df["Average Claims"], marker_color="indigo"))
-            fig8.update_layout(title="Average Claims by Policy Term", xaxis_title="Term", yaxis_title="Avg Claims")
-            st.plotly_chart(fig8, use_container_width=True)
+            cube = load_cube()
+        except FileNotFoundError:
+            cube = None
+            st.info(f"No cube yet. Run `python olap_cube.py` to build '{CUBE_FILE}'.")
+        if cube is not None:
+            by = st.multiselect("Group by", DIMENSIONS, default=['city_tier'])
+            slice_cols = st.columns(4)
+            filters = {}
+            for i, dim in enumerate(DIMENSIONS):
+                values = sorted(cube[dim].unique().tolist(), key=str)
+                picked = slice_cols[i % 4].multiselect(dim, values, key=f"cube_{dim}")
+                if picked:
+                    filters[dim] = picked
+            sliced = query(cube, by, filters)
+            measure = st.selectbox("Measure", [c for c in sliced.columns if c not in DIMENSIONS])
+            st.dataframe(sliced)
+            if by:
+                import plotly.express as px
+                st.plotly_chart(px.bar(sliced, x=by[0], y=measure, color=by[1] if len(by) > 1 else None, barmode="group"),
+                                use_container_width=True)
+
+        # Ad-hoc filtered counts from the bitmap index (python bitmap_index.py build)
+        st.subheader("🔎 Ad-hoc Applicant Counts")
+        try:
+            index = load_bitmap_index()
+        except FileNotFoundError:
+            index = None
+            st.info(f"No bitmap index yet. Run `python bitmap_index.py build` to create '{INDEX_FILE}'.")
+        if index is not None:
+            pick_cols = st.columns(4)
+            conditions = []
+            for i, col in enumerate(index.bitmaps):
+                picked = pick_cols[i % 4].multiselect(col, index.values(col), key=f"bitmap_{col}")
+                if picked:
+                    conditions.append((col, 'in', picked))
+            matches = index.count(conditions)
+            st.metric("Matching applicants", f"{matches:,}", f"{matches / max(index.n_rows, 1):.2%} of {index.n_rows:,}",
+                      delta_color="off")
 
 # ------------------------------
 # 🤖 TAB 3: ML Underwriting
 # ------------------------------
 with tab3:
-    st.header("🤖 ML Predictions: Automated Underwriting")
-
-    uploaded_file = st.file_uploader("📥 Upload insurance dataset", type=["csv"])
-    if uploaded_file:
-        df = pd.read_csv(uploaded_file)
-        st.subheader("📄 Dataset Preview")
-        st.dataframe(df.head())
-
-        true_churn = df['Churn'] if 'Churn' in df.columns else None
-        df = df.drop(columns=['application_id', 'churn_reason'], errors='ignore')
-
-        with open("underwriting_model.pkl", "rb") as f:
-            model = pickle.load(f)
-        with open("scaler.pkl", "rb") as f:
-            scaler = pickle.load(f)
-        with open("label_encoders.pkl", "rb") as f:
-            label_encoders = pickle.load(f)
-
-        for col in df.select_dtypes(include='object').columns:
-            if col in label_encoders:
-                le = label_encoders[col]
-                df[col] = df[col].apply(lambda x: x if x in le.classes_ else le.classes_[0])
-                df[col] = le.transform(df[col])
-            else:
-                df[col] = df[col].astype('category').cat.codes
-
-        X_scaled = scaler.transform(df.drop(columns=['Churn'], errors='ignore'))
-        predicted = model.predict(X_scaled)
-        df['Predicted_Churn'] = predicted
-
-        if true_churn is not None:
-            df['Churn'] = true_churn
-            st.subheader("📊 Confusion Matrix")
-            fig, ax = plt.subplots()
-            sns.heatmap(confusion_matrix(df['Churn'], df['Predicted_Churn']), annot=True, fmt='d',
-                        cmap="Blues", xticklabels=['Not Churn', 'Churn'], yticklabels=['Not Churn', 'Churn'])
-            st.pyplot(fig)
-
-            st.subheader("🧠 Classification Report")
-            st.dataframe(pd.DataFrame(classification_report(df['Churn'], df['Predicted_Churn'], output_dict=True)).transpose())
-
-        st.subheader("📌 Feature Importance")
-        imp = pd.Series(model.feature_importances_, index=df.drop(columns=['Predicted_Churn', 'Churn'], errors='ignore').columns)
-        st.bar_chart(imp.sort_values(ascending=False))
-
-        st.subheader("🎯 Interactive Scatter Plot")
-        num_cols = df.select_dtypes(include=['int64', 'float64']).columns.drop(['Predicted_Churn'], errors='ignore')
-        x = st.selectbox("X-axis", num_cols)
-        y = st.selectbox("Y-axis", num_cols, index=1)
-        st.plotly_chart(px.scatter(df, x=x, y=y, color=df['Predicted_Churn'].map({0: "Not Churn", 1: "Churn"}),
-                                   title=f"{x} vs {y}", symbol='Predicted_Churn'), use_container_width=True)
-
-        st.download_button("📥 Download Predictions CSV", df.to_csv(index=False), file_name="predicted_churn.csv")
-    else:
-        st.info("Upload dataset to see predictions and analysis.")
+    if tab3.open:
+        st.header("🤖 ML Predictions: Automated Underwriting")
+
+        uploaded_file = st.file_uploader("📥 Upload insurance dataset", type=["csv"])
+        if uploaded_file:
+            from model_registry import get_registry
+            from prediction_cache import get_prediction_cache
+            from scoring_jobs import POLL_SECONDS, get_job_queue
+
+            # Scored in the background; the same upload (any session) reuses the finished job
+            job = get_job_queue().submit(uploaded_file.getvalue())
+            if not job.done:
+                st.progress(job.progress, text=f"⏳ Scoring job {job.id[:8]}: {job.stage}...")
+                if job.evaluation is not None and job.evaluation.rows:
+                    # Metrics so far, from the counts merged chunk by chunk
+                    live = job.evaluation.summary()
+                    st.caption(f"Scored so far: {live['rows']:,} labeled rows | accuracy {live['accuracy']:.2%} | "
+                               f"F1 {live['f1']:.3f} | ROC AUC {live['roc_auc']:.3f}")
+                time.sleep(POLL_SECONDS)
+                st.rerun()
+            if job.status == 'failed':
+                st.error(f"❌ Scoring job {job.id[:8]} failed: {job.error}")
+                st.stop()
+
+            result = job.result
+            bundle = get_registry().get()
+            df = result['scored']
+            st.subheader("📄 Dataset Preview")
+            st.dataframe(result['preview'])
+
+            if result['confusion'] is not None:
+                import matplotlib.pyplot as plt
+                import seaborn as sns
+
+                st.subheader("📊 Confusion Matrix")
+                fig, ax = plt.subplots()
+                sns.heatmap(result['confusion'], annot=True, fmt='d',
+                            cmap="Blues", xticklabels=['Not Churn', 'Churn'], yticklabels=['Not Churn', 'Churn'])
+                st.pyplot(fig)
+
+                st.subheader("🧠 Classification Report")
+                st.dataframe(result['report'])
+                st.caption(f"Log loss {result['summary']['log_loss']:.4f} | ROC AUC {result['summary']['roc_auc']:.4f} "
+                           f"({result['summary']['rows']:,} labeled rows)")
+
+            st.subheader("📌 Feature Importance")
+            imp = pd.Series(bundle.model.feature_importances_, index=df.drop(columns=['Predicted_Churn', 'Churn'], errors='ignore').columns)
+            st.bar_chart(imp.sort_values(ascending=False))
+
+            st.subheader("🧾 Top Reasons per Applicant (highest churn risk first)")
+            st.dataframe(result['reasons'].sort_values('Churn_Probability', ascending=False).head(500))
+
+            st.subheader("🎯 Interactive Scatter Plot")
+            num_cols = df.select_dtypes(include='number').columns.drop(['Predicted_Churn'], errors='ignore')
+            x = st.selectbox("X-axis", num_cols)
+            y = st.selectbox("Y-axis", num_cols, index=1)
+            # Large uploads are binned on the server; narrowing the axis ranges gives finer bins
+            ranges = {}
+            for axis, col in (("X", x), ("Y", y)):
+                lo, hi = float(df[col].min()), float(df[col].max())
+                if lo < hi:
+                    ranges[axis] = st.slider(f"{axis} range ({col})", lo, hi, (lo, hi), key=f"scatter_{axis}_{col}")
+            points = pd.DataFrame({x: df[x], y: df[y], 'Prediction': df['Predicted_Churn'].map({0: "Not Churn", 1: "Churn"})})
+            st.plotly_chart(density_scatter(points, x, y, 'Prediction', ranges.get("X"), ranges.get("Y"),
+                                            title=f"{x} vs {y}"), use_container_width=True)
+
+            cache_stats = get_prediction_cache().stats()
+            st.caption(f"Model version: {result['model_version']} | Job {job.id[:8]} scored in "
+                       f"{job.finished_at - job.started_at:.1f}s | Prediction cache hit rate: {cache_stats['hit_rate']:.1%}")
+            st.download_button("📥 Download Predictions CSV", df.assign(Model_Version=result['model_version']).to_csv(index=False),
+                               file_name="predicted_churn.csv")
+        else:
+            st.info("Upload dataset to see predictions and analysis.")
 
 
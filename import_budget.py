@@ -0,0 +1,102 @@
+# import_budget.py
+#
+# Cold-start import cost of the entry points, measured with `python -X importtime`.
+# Each entry point runs in a fresh interpreter; its import time is the sum of
+# the cumulative times of the top-level imports it triggered. The run fails
+# (exit 1) when an entry point exceeds its budget or exits with an error.
+# Streamlit scripts run in bare mode (outside the server): widgets return their
+# defaults and tabs report no open tab, so the number is the fixed cost of
+# starting the script, before any view imports its own charting or ML libraries.
+# They run with the repo at the end of sys.path, as under `streamlit run`
+# (which imports the package before the script), so the repo's streamlit.py
+# does not shadow the real package.
+#
+# Usage:
+#   python import_budget.py                 # all entry points, best of 3 runs each
+#   python import_budget.py final.py --runs 5 --top 10
+
+import argparse
+import os
+import subprocess
+import sys
+
+# --- Config ---
+# name: (argv after `python -X importtime`, budget in ms)
+ENTRY_POINTS = {
+    'final.py': (['final.py'], 1_500),
+    'streamlit_app.py': (['streamlit_app.py'], 1_500),
+    'monitor_dashboard.py': (['monitor_dashboard.py'], 2_000),
+    'prediction.py': (['prediction.py'], 3_000),
+    'batch_score.py': (['batch_score.py', '--help'], 800),
+    'bitmap_index.py': (['bitmap_index.py', 'count', 'smoker=Yes'], 300),
+}
+# Artifacts an entry point reads, and the (untimed) command that builds them when missing
+SETUP = {
+    'bitmap_index.py': ('bitmap_index.pkl', ['bitmap_index.py', 'build']),
+}
+STREAMLIT_APPS = {'final.py', 'streamlit_app.py', 'monitor_dashboard.py'}
+RUNS = 3
+TOP = 5
+
+# Runs sys.argv[1] as __main__ with the working directory moved to the end of sys.path
+APP_RUNNER = "import runpy, sys; sys.path.append(sys.path.pop(0)); runpy.run_path(sys.argv[1], run_name='__main__')"
+
+
+def parse_importtime(stderr):
+    """{top-level module: cumulative microseconds} from `-X importtime` output."""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented by two spaces per level after the single leading space
+        if not name.startswith('  '):
+            imports[name.strip()] = imports.get(name.strip(), 0) + int(cumulative)
+    return imports
+
+
+def measure(argv):
+    """(total ms, {module: ms}, exit code, last stderr line) for one cold run."""
+    if argv[0] in STREAMLIT_APPS:
+        argv = ['-c', APP_RUNNER, *argv]
+    proc = subprocess.run([sys.executable, '-X', 'importtime', *argv], capture_output=True, text=True)
+    imports = parse_importtime(proc.stderr)
+    errors = [line for line in proc.stderr.splitlines() if not line.startswith('import time:')]
+    return (sum(imports.values()) / 1000, {name: us / 1000 for name, us in imports.items()}, proc.returncode,
+            errors[-1] if errors else '')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check entry-point import time against per-entry budgets.")
+    parser.add_argument("entry_points", nargs="*", default=list(ENTRY_POINTS))
+    parser.add_argument("--runs", type=int, default=RUNS, help="Runs per entry point; the fastest counts")
+    parser.add_argument("--top", type=int, default=TOP, help="Heaviest top-level imports to list")
+    args = parser.parse_args()
+
+    over = []
+    print(f"\n📦 Import time per entry point (best of {args.runs} cold runs)")
+    for name in args.entry_points:
+        argv, budget = ENTRY_POINTS[name]
+        if name in SETUP and not os.path.exists(SETUP[name][0]):
+            print(f"🔧 {name}: building {SETUP[name][0]} first (not timed)")
+            subprocess.run([sys.executable, *SETUP[name][1]], capture_output=True, check=True)
+        runs = [measure(argv) for _ in range(args.runs)]
+        # A crashed run stops importing early: any failure fails the entry point, whatever its time
+        failed = next((run for run in runs if run[2] != 0), None)
+        total, imports, code, error = failed or min(runs, key=lambda r: r[0])
+        ok = failed is None and total <= budget
+        if not ok:
+            over.append(name)
+        status = "✅" if ok else "❌"
+        print(f"{status} {name:<22} {total:7.0f} ms (budget {budget:,} ms){'' if code == 0 else f' [exit {code}: {error}]'}")
+        heaviest = sorted(imports.items(), key=lambda kv: -kv[1])[:args.top]
+        print("     " + ", ".join(f"{module} {ms:.0f}" for module, ms in heaviest))
+
+    if over:
+        print(f"\n❌ Over budget or failing: {', '.join(over)}")
+        sys.exit(1)
+    print("\n✅ All entry points within budget")
+
+
+if __name__ == "__main__":
+    main()
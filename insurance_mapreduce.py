@@ -11,6 +11,7 @@ from datetime import datetime
 CSV_FILE = '/Users/aaditya/Desktop/sharan bdt project/models/combined_life_insurance_with_churn_reason.csv'
 RESULTS_FILE = 'insurance_mapreduce_results.json'
 ROW_LIMIT = 10000
+WRITE_CHART_SPECS = True   # also render the dashboard's figure specs (needs plotly; see mapreduce_charts.py)
 
 # --- Check and read headers ---
 def print_csv_headers():
@@ -81,17 +82,49 @@ def reduce_insurance_data(mapped_data):
 
     return results
 
+# --- Tidy tables for the dashboards ---
+def build_tidy_tables(results):
+    """One list of ready-to-plot records per task, parsed once here instead of on every dashboard rerun."""
+    tables = {'churn_by_city': [], 'risk_by_health': [], 'underwriting': [], 'claims_by_term': []}
+    for key, value in results.items():
+        if key.startswith('churn_by_city_'):
+            *_, city, reason = key.split('_')
+            tables['churn_by_city'].append({"City Tier": city, "Churn Reason": reason, "Count": value})
+        elif key.startswith('risk_by_health_'):
+            _, _, smoker, condition = key.split('_', 3)
+            tables['risk_by_health'].append({"Smoker": smoker, "Condition": condition, "Average Risk Score": value})
+        elif key.startswith('underwriting_'):
+            _, income, credit, decision = key.split('_', 3)
+            tables['underwriting'].append({"Income Bracket": income, "Credit Bracket": credit,
+                                           "Decision": decision.capitalize(), "Count": value})
+        elif key.startswith('claims_by_term_'):
+            tables['claims_by_term'].append({"Policy Term (Years)": int(key.split('_')[-1]),
+                                             "Total Claims": value["total_claims"],
+                                             "Average Claims": value["average_claims"]})
+    tables['claims_by_term'].sort(key=lambda r: r["Policy Term (Years)"])
+    return tables
+
 # --- Save results to JSON ---
 def save_results_to_json(results, headers, row_count):
     output_data = {
         'timestamp': datetime.now().isoformat(),
         'row_count': row_count,
         'headers': headers,
-        'analysis_results': results
+        'analysis_results': results,
+        'tidy_tables': build_tidy_tables(results)
     }
     with open(RESULTS_FILE, 'w') as f:
         json.dump(output_data, f, indent=2)
     print(f"\n✅ Results saved to '{RESULTS_FILE}'")
+    return output_data
+
+# --- Save dashboard chart specs (stamped like the results they were rendered from) ---
+def save_chart_specs(output_data):
+    try:
+        from mapreduce_charts import save_chart_specs as save_specs
+        save_specs(output_data['tidy_tables'], output_data['timestamp'])
+    except ImportError as exc:
+        print(f"⚠️ Chart specs skipped ({exc}); the dashboards will build the figures themselves")
 
 # --- Print Task-wise Breakdown ---
 def print_categorized_results(results):
@@ -114,7 +147,7 @@ def print_categorized_results(results):
     print_section("Task 4: Claims by Policy Term", lambda k: k.startswith("claims_by_term_"))
 
 # --- Main Execution ---
-def run_insurance_mapreduce():
+def run_insurance_mapreduce(charts=WRITE_CHART_SPECS):
     print("\n📊 Starting Insurance Underwriting MapReduce Analysis")
     print("=" * 65)
 
@@ -132,7 +165,9 @@ def run_insurance_mapreduce():
     flat_mapped = [item for sublist in mapped for item in sublist if sublist]
     reduced = reduce_insurance_data(flat_mapped)
 
-    save_results_to_json(reduced, headers, len(rows))
+    output_data = save_results_to_json(reduced, headers, len(rows))
+    if charts:
+        save_chart_specs(output_data)
 
     print("\n📌 SAMPLE SUMMARY OF ANALYSIS (Top 20)")
     print("=" * 65)
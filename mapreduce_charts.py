@@ -0,0 +1,141 @@
+# mapreduce_charts.py
+#
+# Plotly figures of the MapReduce dashboard tab, built from the job's tidy tables.
+# The MapReduce job renders the unfiltered figures once per run and stores
+# their JSON specs in CHARTS_FILE next to the results. The dashboards then
+# show a stored spec as read from disk and narrow it where Plotly can do the
+# filtering itself: trace visibility, axis ranges, and one pre-rendered
+# variant per smoker type. Any other filter rebuilds the figure from the tables.
+#
+# Usage:
+#   python mapreduce_charts.py [results.json]   # (re)render the specs for an existing results file
+
+import json
+import os
+import sys
+
+import pandas as pd
+
+# --- Config ---
+RESULTS_FILE = 'insurance_mapreduce_results.json'
+CHARTS_FILE = 'insurance_mapreduce_charts.json'
+
+# Selection fields each figure depends on
+FIGURE_FILTERS = {
+    'churn_bar': ('city', 'reason'), 'churn_sunburst': ('city', 'reason'),
+    'risk_bar': ('smoker',), 'risk_pie': ('smoker',),
+    'uw_bar': ('income', 'credit'), 'uw_treemap': ('income', 'credit'),
+    'claims_line': ('term',), 'claims_avg': ('term',),
+}
+
+
+# --- Figures from the tidy tables ---
+def default_selection(tables):
+    """What the dashboard sidebar starts with: every value selected, the first smoker type, all terms."""
+    churn, uw, terms = tables["churn_by_city"], tables["underwriting"], tables["claims_by_term"]["Policy Term (Years)"]
+    return {
+        'city': tuple(churn["City Tier"].unique()), 'reason': tuple(churn["Churn Reason"].unique()),
+        'smoker': tables["risk_by_health"]["Smoker"].iloc[0],
+        'income': tuple(uw["Income Bracket"].unique()), 'credit': tuple(uw["Credit Bracket"].unique()),
+        'term': (int(terms.min()), int(terms.max())),
+    }
+
+
+def build_figures(tables, sel, names=tuple(FIGURE_FILTERS)):
+    """Figures `names` for the tables filtered to `sel` (a selection dict as in default_selection)."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    figs = {}
+    if {'churn_bar', 'churn_sunburst'} & set(names):
+        churn_df = tables["churn_by_city"]
+        churn_df = churn_df[churn_df["City Tier"].isin(sel["city"]) & churn_df["Churn Reason"].isin(sel["reason"])]
+        figs['churn_bar'] = px.bar(churn_df, x="City Tier", y="Count", color="Churn Reason", barmode="group")
+        figs['churn_sunburst'] = px.sunburst(churn_df, path=["City Tier", "Churn Reason"], values="Count")
+    if {'risk_bar', 'risk_pie'} & set(names):
+        risk_df = tables["risk_by_health"]
+        risk_df = risk_df[risk_df["Smoker"] == sel["smoker"]]
+        figs['risk_bar'] = px.bar(risk_df, x="Condition", y="Average Risk Score", color="Condition")
+        figs['risk_pie'] = px.pie(risk_df, names="Condition", values="Average Risk Score")
+    if {'uw_bar', 'uw_treemap'} & set(names):
+        uw_df = tables["underwriting"]
+        uw_df = uw_df[uw_df["Income Bracket"].isin(sel["income"]) & uw_df["Credit Bracket"].isin(sel["credit"])]
+        figs['uw_bar'] = px.bar(uw_df, x="Income Bracket", y="Count", color="Decision", facet_col="Credit Bracket")
+        figs['uw_treemap'] = px.treemap(uw_df, path=["Credit Bracket", "Income Bracket", "Decision"], values="Count")
+    if {'claims_line', 'claims_avg'} & set(names):
+        claims_df = tables["claims_by_term"]
+        claims_df = claims_df[claims_df["Policy Term (Years)"].between(*sel["term"])]
+        figs['claims_line'] = px.line(claims_df, x="Policy Term (Years)", y="Total Claims", markers=True)
+        avg_claims = go.Figure()
+        avg_claims.add_trace(go.Bar(x=claims_df["Policy Term (Years)"], y=claims_df["Average Claims"], marker_color="indigo"))
+        avg_claims.update_layout(title="Average Claims by Policy Term", xaxis_title="Term", yaxis_title="Avg Claims")
+        figs['claims_avg'] = avg_claims
+    return {name: figs[name] for name in names}
+
+
+# --- Stored specs (written by the MapReduce job) ---
+def render_specs(tidy_tables, timestamp):
+    """JSON-ready specs of the unfiltered figures, plus the risk figures for every smoker type."""
+    tables = {name: pd.DataFrame(records) for name, records in tidy_tables.items()}
+    default = default_selection(tables)
+    as_spec = lambda fig: json.loads(fig.to_json())
+    by_smoker = {}
+    for smoker in tables["risk_by_health"]["Smoker"].unique():
+        figs = build_figures(tables, {**default, 'smoker': smoker}, names=('risk_bar', 'risk_pie'))
+        by_smoker[str(smoker)] = {name: as_spec(fig) for name, fig in figs.items()}
+    return {
+        'timestamp': timestamp,
+        'default_selection': {k: list(v) if isinstance(v, tuple) else v for k, v in default.items()},
+        'figures': {name: as_spec(fig) for name, fig in build_figures(tables, default).items()},
+        'risk_by_smoker': by_smoker,
+    }
+
+
+def save_chart_specs(tidy_tables, timestamp, path=CHARTS_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(render_specs(tidy_tables, timestamp), f)
+    os.replace(tmp, path)
+    print(f"📊 Chart specs saved to '{path}'")
+
+
+def spec_figure(specs, name, sel):
+    """
+    The stored spec of figure `name` narrowed to the selection `sel`, or None when
+    a stored spec cannot express it (the figure is then built from the tables).
+    """
+    default = specs['default_selection']
+    if name in ('risk_bar', 'risk_pie'):
+        return specs['risk_by_smoker'].get(str(sel['smoker']), {}).get(name)
+
+    spec = specs['figures'][name]
+    if name in ('claims_line', 'claims_avg'):
+        lo, hi = sel['term']
+        if [lo, hi] == default['term']:
+            return spec
+        xaxis = {**spec['layout'].get('xaxis', {}), 'range': [lo - 0.5, hi + 0.5]}
+        return {**spec, 'layout': {**spec['layout'], 'xaxis': xaxis}}
+
+    unchanged = {f for f in FIGURE_FILTERS[name] if set(sel[f]) == set(default[f])}
+    if unchanged == set(FIGURE_FILTERS[name]):
+        return spec
+    if name == 'churn_bar' and unchanged == {'city'}:
+        # One trace per churn reason: deselected reasons stay one legend click away
+        data = [{**trace, 'visible': True if trace.get('name') in sel['reason'] else 'legendonly'}
+                for trace in spec['data']]
+        return {**spec, 'data': data}
+    return None
+
+
+# --- Main Execution ---
+def main(results_file=RESULTS_FILE):
+    from insurance_mapreduce import build_tidy_tables
+
+    with open(results_file) as f:
+        data = json.load(f)
+    tables = data.get('tidy_tables') or build_tidy_tables(data['analysis_results'])
+    save_chart_specs(tables, data['timestamp'])
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
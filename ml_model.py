@@ -1,75 +1,377 @@
 # ml_model.py
+#
+# Usage:
+#   python ml_model.py             # train the default regularised model
+#   python ml_model.py --search    # k-fold CV hyperparameter search, parallel trials
+#   python ml_model.py --external-memory --csv big.csv   # stream chunks; data never fully in RAM
+#   python ml_model.py --update new_batch.csv            # daily warm-start update (weekly runs retrain fully)
+#   python ml_model.py --csv motor_north.csv --model-dir model_store/motor_north   # one of several served models
+
+import argparse
+import copy
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 import xgboost as xgb
-import pickle
-
-# Load data
-df = pd.read_csv('combined_life_insurance_with_churn_reason.csv')
-
-# Clean columns
-df.drop(columns=['application_id', 'churn_reason'], inplace=True, errors='ignore')
-
-# Encode categorical features
-label_encoders = {}
-for col in df.select_dtypes(include='object').columns:
-    le = LabelEncoder()
-    df[col] = le.fit_transform(df[col].astype(str))
-    label_encoders[col] = le
-
-# Slight noise on numerics
-for col in ['income', 'credit_score', 'bmi', 'risk_aversion_score']:
-    if col in df.columns:
-        df[col] = df[col] * (1 + np.random.normal(0, 0.015, size=df.shape[0]))
-
-# Split features/target
-X = df.drop('Churn', axis=1)
-y = df['Churn']
-
-# Scale
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-# Train/test split
-X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
-
-# Model with strong regularization
-model = xgb.XGBClassifier(
-    n_estimators=100,
-    max_depth=3,
-    learning_rate=0.05,
-    subsample=0.6,
-    colsample_bytree=0.6,
-    reg_alpha=4,
-    reg_lambda=2,
-    gamma=2,
-    use_label_encoder=False,
-    eval_metric='logloss'
-)
-
-# Train
-model.fit(X_train, y_train)
-
-# Evaluate
-y_pred = model.predict(X_test)
-acc = accuracy_score(y_test, y_pred)
-
-print(f"\n✅ Model Accuracy: {acc * 100:.2f}%")
-print("\n📊 Confusion Matrix:")
-print(confusion_matrix(y_test, y_pred))
-print("\n🧠 Classification Report:")
-print(classification_report(y_test, y_pred))
-
-# Save artifacts
-with open("underwriting_model.pkl", "wb") as f:
-    pickle.dump(model, f)
-with open("scaler.pkl", "wb") as f:
-    pickle.dump(scaler, f)
-with open("label_encoders.pkl", "wb") as f:
-    pickle.dump(label_encoders, f)
-
-print("\n💾 Model & preprocessors saved.")
+from model_compiler import fold_scaler, booster_to_json, json_to_classifier, remap_thresholds, scaler_params
+from model_registry import publish_artifacts
+from drift_monitor import REFERENCE_PROFILE_FILE, build_reference_profile, save_reference_profile
+from scoring import (MODEL_FILE, SCALER_FILE, ENCODERS_FILE, TARGET_COLUMN, load_pickle, encode_features,
+                     training_features)
+import streaming_training
+
+# --- Config ---
+CSV_FILE = 'combined_life_insurance_with_churn_reason.csv'
+SEARCH_LOG_FILE = 'model_search_log.json'         # one per model directory
+TRAINING_HISTORY_FILE = 'training_history.json'    # one per model directory
+NOISE_COLUMNS = ['income', 'credit_score', 'bmi', 'risk_aversion_score']
+
+# Hyperparameter grid for --search; every combination is one trial
+SEARCH_SPACE = {
+    'max_depth': [3, 4, 6],
+    'learning_rate': [0.05, 0.1],
+    'subsample': [0.6, 0.8],
+    'colsample_bytree': [0.6, 0.8],
+    'min_child_weight': [1, 5],
+}
+SEARCH_FIXED_PARAMS = {
+    'objective': 'binary:logistic',
+    'eval_metric': 'logloss',
+    'tree_method': 'hist',
+    'reg_alpha': 4,
+    'reg_lambda': 2,
+    'gamma': 2,
+}
+CV_FOLDS = 5
+MAX_BOOST_ROUNDS = 1000
+EARLY_STOPPING_ROUNDS = 30
+
+# Default model, with strong regularization; warm-start updates append rounds with the same settings
+DEFAULT_PARAMS = {
+    'max_depth': 3,
+    'learning_rate': 0.05,
+    'subsample': 0.6,
+    'colsample_bytree': 0.6,
+    'reg_alpha': 4,
+    'reg_lambda': 2,
+    'gamma': 2,
+    'eval_metric': 'logloss',
+}
+
+# Warm-start updates: rounds appended per batch, and the largest holdout accuracy drop accepted
+UPDATE_ROUNDS = 20
+MAX_ACCURACY_DROP = 0.01
+
+
+# --- Load and encode data ---
+def load_training_data(csv_file=CSV_FILE):
+    df = pd.read_csv(csv_file)
+
+    # Clean columns
+    df.drop(columns=['application_id', 'churn_reason'], inplace=True, errors='ignore')
+
+    # Encode categorical features
+    label_encoders = {}
+    for col in df.select_dtypes(include='object').columns:
+        le = LabelEncoder()
+        df[col] = le.fit_transform(df[col].astype(str))
+        label_encoders[col] = le
+
+    add_training_noise(df)
+
+    # Split features/target
+    X = df.drop('Churn', axis=1)
+    y = df['Churn']
+    return X, y, label_encoders
+
+
+def add_training_noise(df):
+    # Slight noise on numerics
+    for col in NOISE_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col] * (1 + np.random.normal(0, 0.015, size=df.shape[0]))
+
+
+def print_evaluation(model, X_test, y_test):
+    y_pred = model.predict(X_test)
+    acc = accuracy_score(y_test, y_pred)
+
+    print(f"\n✅ Model Accuracy: {acc * 100:.2f}%")
+    print("\n📊 Confusion Matrix:")
+    print(confusion_matrix(y_test, y_pred))
+    print("\n🧠 Classification Report:")
+    print(classification_report(y_test, y_pred))
+    return acc
+
+
+def save_model(model, scaler, label_encoders, X, model_dir=".", keep_profile=False):
+    # Fold the scaler into the split thresholds so scoring can skip scaler.transform
+    compiled = fold_scaler(model, scaler, X)
+
+    # Save artifacts (atomically, so running dashboards pick up the new version in one step)
+    version = publish_artifacts(model, scaler, label_encoders, compiled, directory=model_dir)
+
+    # Feature distribution of this training data, the baseline for drift_monitor.py;
+    # keep_profile leaves the baseline of the last full training run in place
+    profile_path = os.path.join(model_dir, REFERENCE_PROFILE_FILE)
+    if not (keep_profile and os.path.exists(profile_path)):
+        save_reference_profile(build_reference_profile(X, list(label_encoders), version), profile_path)
+
+    print(f"\n💾 Model, compiled model & preprocessors saved (version {version}).")
+    return version
+
+
+# --- Default training ---
+def train_default(X_train, y_train):
+    # Model with strong regularization
+    model = xgb.XGBClassifier(n_estimators=100, **DEFAULT_PARAMS)
+    model.fit(X_train, y_train)
+    return model
+
+
+# --- Hyperparameter search ---
+_folds = None
+
+
+def _init_search_worker(X_train, y_train, n_folds):
+    """Build the DMatrix and its CV fold slices once per worker; every trial reuses them."""
+    global _folds
+    dtrain = xgb.DMatrix(X_train, label=y_train)
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42)
+    _folds = [(dtrain.slice(tr), dtrain.slice(va), np.asarray(y_train)[va])
+              for tr, va in splitter.split(X_train, y_train)]
+
+
+def run_trial(trial_id, params, nthread):
+    params = {**SEARCH_FIXED_PARAMS, **params, 'nthread': nthread, 'seed': 42}
+    start = time.perf_counter()
+    rounds, losses, accs = [], [], []
+
+    for d_fold_train, d_fold_valid, y_valid in _folds:
+        booster = xgb.train(params, d_fold_train, num_boost_round=MAX_BOOST_ROUNDS,
+                            evals=[(d_fold_valid, 'valid')],
+                            early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False)
+        best = booster.best_iteration + 1
+        proba = booster.predict(d_fold_valid, iteration_range=(0, best))
+        rounds.append(best)
+        losses.append(booster.best_score)
+        accs.append(float(((proba > 0.5) == y_valid).mean()))
+
+    return {
+        'trial': trial_id,
+        'params': {k: params[k] for k in SEARCH_SPACE},
+        'cv_accuracy': round(float(np.mean(accs)), 4),
+        'cv_logloss': round(float(np.mean(losses)), 4),
+        'boost_rounds': int(np.mean(rounds)),
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+
+
+def search(X_train, y_train, workers=None, n_folds=CV_FOLDS):
+    """Run every SEARCH_SPACE combination as a k-fold CV trial, several trials at a time."""
+    workers = workers or os.cpu_count() or 1
+    nthread = max(1, (os.cpu_count() or 1) // workers)
+    grid = [dict(zip(SEARCH_SPACE, values)) for values in product(*SEARCH_SPACE.values())]
+    print(f"\n🔎 Searching {len(grid)} configurations × {n_folds} folds on {workers} workers ({nthread} threads each)...")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker,
+                             initargs=(np.asarray(X_train), np.asarray(y_train), n_folds)) as pool:
+        futures = [pool.submit(run_trial, i, params, nthread) for i, params in enumerate(grid)]
+        trials = [f.result() for f in futures]
+
+    print("\n⏱️ Trial time vs CV accuracy")
+    table = pd.DataFrame([{**t['params'], **{k: t[k] for k in ('cv_accuracy', 'cv_logloss', 'boost_rounds', 'seconds')}}
+                          for t in trials])
+    print(table.sort_values('cv_logloss').to_string(index=False))
+    return sorted(trials, key=lambda t: t['cv_logloss'])
+
+
+def train_best(best_params, X_train, y_train):
+    # Final fit with early stopping on a validation split carved out of the training data
+    X_fit, X_valid, y_fit, y_valid = train_test_split(X_train, y_train, test_size=0.1,
+                                                      random_state=42, stratify=y_train)
+    params = {k: v for k, v in SEARCH_FIXED_PARAMS.items() if k != 'objective'}
+    model = xgb.XGBClassifier(n_estimators=MAX_BOOST_ROUNDS, early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                              **params, **best_params)
+    model.fit(X_fit, y_fit, eval_set=[(X_valid, y_valid)], verbose=False)
+    return model
+
+
+# --- Training history ---
+def record_training_run(mode, seconds, accuracy, rows, version, published=True, model_dir="."):
+    path = os.path.join(model_dir, TRAINING_HISTORY_FILE)
+    history = []
+    if os.path.exists(path):
+        with open(path) as f:
+            history = json.load(f)
+    history.append({
+        'mode': mode,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seconds': round(seconds, 2),
+        'accuracy': round(float(accuracy), 4),
+        'rows': int(rows),
+        'model_version': version,
+        'published': published,
+    })
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=2)
+    return history
+
+
+def last_full_retrain(model_dir="."):
+    path = os.path.join(model_dir, TRAINING_HISTORY_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        full_runs = [run for run in json.load(f) if run['mode'] != 'update' and run['published']]
+    return full_runs[-1] if full_runs else None
+
+
+# --- Warm-start update ---
+def update_model(batch_csv, rounds=UPDATE_ROUNDS, max_drop=MAX_ACCURACY_DROP, model_dir=".", reference_csv=CSV_FILE):
+    """
+    Append boosting rounds trained on a new labelled batch to the published model.
+    Publishes only if accuracy on the batch's holdout drops by at most `max_drop`.
+    The drift reference profile is kept; threshold snapping uses reference_csv
+    (the training data) together with the batch.
+    """
+    start = time.perf_counter()
+    model = load_pickle(os.path.join(model_dir, MODEL_FILE))
+    scaler = load_pickle(os.path.join(model_dir, SCALER_FILE))
+    label_encoders = load_pickle(os.path.join(model_dir, ENCODERS_FILE))
+
+    batch = pd.read_csv(batch_csv)
+    X = encode_features(batch, label_encoders, np.float64, training_features(scaler))
+    # Values the thresholds are snapped against: the training data as well as this batch
+    X_reference = X
+    if reference_csv and os.path.exists(reference_csv):
+        X_reference = pd.concat([encode_features(pd.read_csv(reference_csv), label_encoders, np.float64,
+                                                 training_features(scaler)), X], ignore_index=True)
+    y = batch[TARGET_COLUMN]
+    X_fit, X_hold, y_fit, y_hold = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_fit = X_fit.copy()
+    add_training_noise(X_fit)
+
+    # Update the scaler statistics with the new rows, then move the existing
+    # trees into the updated scaler's units so their splits stay where they were
+    new_scaler = copy.deepcopy(scaler)
+    new_scaler.partial_fit(X_fit)
+    base = remap_thresholds(model, scaler_params(scaler), scaler_params(new_scaler), X_reference)
+
+    # An early-stopped model predicts with its first best_iteration + 1 rounds only, and
+    # the marker would hide the appended rounds: keep just the rounds it serves and drop
+    # the marker. The new classifier is built from explicit params (get_params fails on
+    # legacy pickles).
+    booster = base.get_booster()
+    if booster.attr('best_iteration') is not None:
+        booster = booster[:int(booster.attr('best_iteration')) + 1]
+    booster.set_attr(best_iteration=None, best_score=None)
+    base_rounds = booster.num_boosted_rounds()
+    base_proba = base.predict_proba(new_scaler.transform(X_hold))[:, 1]
+    updated = xgb.XGBClassifier(n_estimators=rounds, **DEFAULT_PARAMS)
+    updated.fit(new_scaler.transform(X_fit), y_fit, xgb_model=booster)
+    seconds = time.perf_counter() - start
+
+    if updated.get_booster().num_boosted_rounds() != base_rounds + rounds or np.array_equal(
+            base_proba, updated.predict_proba(new_scaler.transform(X_hold))[:, 1]):
+        raise RuntimeError("Warm-start update did not change the model's predictions")
+
+    current_acc = accuracy_score(y_hold, model.predict(scaler.transform(X_hold)))
+    updated_acc = accuracy_score(y_hold, updated.predict(new_scaler.transform(X_hold)))
+
+    print(f"\n⏱️ Update: {rounds} rounds on {len(X_fit):,} new rows in {seconds:.1f}s "
+          f"({updated.get_booster().num_boosted_rounds()} rounds total)")
+    print(f"🧪 Holdout accuracy: current {current_acc * 100:.2f}% → updated {updated_acc * 100:.2f}%")
+    full = last_full_retrain(model_dir)
+    if full:
+        print(f"📏 Last full retrain ({full['timestamp']}): {full['seconds']:.1f}s, "
+              f"accuracy {full['accuracy'] * 100:.2f}% on {full['rows']:,} rows")
+
+    if updated_acc < current_acc - max_drop:
+        print(f"❌ Holdout check failed (drop > {max_drop * 100:.1f} pts); keeping the current model.")
+        record_training_run('update', seconds, updated_acc, len(X_fit), None, published=False, model_dir=model_dir)
+        return None
+
+    version = save_model(updated, new_scaler, label_encoders, X_reference, model_dir, keep_profile=True)
+    record_training_run('update', seconds, updated_acc, len(X_fit), version, model_dir=model_dir)
+    return updated
+
+
+# --- Main Execution ---
+def main():
+    parser = argparse.ArgumentParser(description="Train the underwriting churn model.")
+    parser.add_argument("--csv", default=CSV_FILE,
+                        help="Training data; with --update, the rows split thresholds are snapped against")
+    parser.add_argument("--search", action="store_true", help="Run a parallel k-fold CV hyperparameter search")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel search trials (default: all cores)")
+    parser.add_argument("--folds", type=int, default=CV_FOLDS)
+    parser.add_argument("--external-memory", action="store_true",
+                        help="Train from streamed chunks (CSV or .parquet) instead of loading the file")
+    parser.add_argument("--chunk-size", type=int, default=streaming_training.CHUNK_SIZE)
+    parser.add_argument("--update", metavar="BATCH_CSV",
+                        help="Warm-start: append rounds trained on a new labelled batch to the published model")
+    parser.add_argument("--update-rounds", type=int, default=UPDATE_ROUNDS)
+    parser.add_argument("--max-accuracy-drop", type=float, default=MAX_ACCURACY_DROP)
+    parser.add_argument("--model-dir", default=".",
+                        help="Publish into this directory, e.g. model_store/<product>_<region> for MultiModelRegistry")
+    args = parser.parse_args()
+
+    if args.update:
+        update_model(args.update, args.update_rounds, args.max_accuracy_drop, args.model_dir, args.csv)
+        return
+
+    start = time.perf_counter()
+    if args.external_memory:
+        booster, label_encoders, scaler, reference, acc = streaming_training.train_external_memory(args.csv, args.chunk_size)
+        version = save_model(json_to_classifier(booster_to_json(booster)), scaler, label_encoders, reference,
+                             args.model_dir)
+        record_training_run('external-memory', time.perf_counter() - start, acc, scaler.n_samples_seen_, version,
+                            model_dir=args.model_dir)
+        return
+
+    X, y, label_encoders = load_training_data(args.csv)
+
+    # Scale
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    # Train/test split
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
+
+    if args.search:
+        trials = search(X_train, y_train, args.workers, args.folds)
+        best = trials[0]
+        print(f"\n🏆 Best trial {best['trial']}: {best['params']} (CV accuracy {best['cv_accuracy'] * 100:.2f}%)")
+        model = train_best(best['params'], X_train, y_train)
+    else:
+        model = train_default(X_train, y_train)
+    seconds = time.perf_counter() - start
+
+    acc = print_evaluation(model, X_test, y_test)
+    version = save_model(model, scaler, label_encoders, X, args.model_dir)
+    record_training_run('search' if args.search else 'full', seconds, acc, len(X), version, model_dir=args.model_dir)
+
+    if args.search:
+        search_log = os.path.join(args.model_dir, SEARCH_LOG_FILE)
+        with open(search_log, 'w') as f:
+            json.dump({
+                'model_version': version,
+                'total_seconds': round(seconds, 2),
+                'best_trial': best['trial'],
+                'best_iteration': int(model.best_iteration),
+                'test_accuracy': round(float(acc), 4),
+                'trials': trials,
+            }, f, indent=2)
+        print(f"📝 Search log saved to '{search_log}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# model_compaction.py
+#
+# Measures what each boosting round buys and ships a smaller model.
+# Two families of variants are scored on the test split:
+#   truncated_k - the first k rounds (what early stopping would have kept)
+#   pruned_k    - the k trees with the largest mean |leaf value| on the training rows
+# For each variant: accuracy, per-batch and per-record latency, and size.
+# The smallest variant within the accuracy-loss budget is written out.
+#
+# Usage:
+#   python model_compaction.py                          # report + underwriting_model_compact.pkl
+#   python model_compaction.py --max-accuracy-loss 0.002 --publish   # also serve the compact model
+
+import argparse
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from model_compiler import BENCH_REPEATS, booster_to_json, json_to_classifier
+from scoring import (MODEL_FILE, SCALER_FILE, ENCODERS_FILE, TARGET_COLUMN, encode_features, load_pickle,
+                     served_rounds)
+
+# --- Config ---
+CSV_FILE = 'combined_life_insurance_with_churn_reason.csv'
+MAX_ACCURACY_LOSS = 0.005
+STEP = 10
+COMPACT_MODEL_FILE = "underwriting_model_compact.pkl"
+COMPACTION_REPORT_FILE = "compaction_report.json"
+
+
+# --- Tree selection ---
+def select_trees(model_json, keep):
+    """Copy of a binary-classifier model JSON holding only the trees at indices `keep` (original order)."""
+    model_json = json.loads(json.dumps(model_json))
+    gbtree = model_json['learner']['gradient_booster']['model']
+    trees = [gbtree['trees'][i] for i in sorted(keep)]
+    for new_id, tree in enumerate(trees):
+        tree['id'] = new_id
+    gbtree['trees'] = trees
+    gbtree['tree_info'] = [0] * len(trees)
+    gbtree['iteration_indptr'] = list(range(len(trees) + 1))
+    gbtree['gbtree_model_param']['num_trees'] = str(len(trees))
+    # An early-stopping marker would point past the kept trees (and make predict raise)
+    attributes = model_json['learner'].get('attributes', {})
+    for name in ('best_iteration', 'best_score'):
+        attributes.pop(name, None)
+    return model_json
+
+
+def tree_contributions(booster, model_json, X):
+    """Mean |leaf value| each tree adds to the margin over the rows of X."""
+    leaves = booster.predict(xgb.DMatrix(X), pred_leaf=True).astype(np.int64)
+    trees = model_json['learner']['gradient_booster']['model']['trees']
+    return np.array([np.abs(np.asarray(tree['split_conditions'])[leaves[:, t]]).mean()
+                     for t, tree in enumerate(trees)])
+
+
+# --- Measurement ---
+def time_ms(fn, repeats=BENCH_REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def evaluate_variant(name, model, X_test, y_test):
+    one = X_test[:1]
+    return {
+        'variant': name,
+        'trees': served_rounds(model.get_booster()),
+        'accuracy': round(float(accuracy_score(y_test, model.predict(X_test))), 4),
+        'batch_ms': round(time_ms(lambda: model.predict_proba(X_test)), 3),
+        'record_ms': round(time_ms(lambda: model.predict_proba(one)), 3),
+        'size_kb': round(len(model.get_booster().save_raw('ubj')) / 1024, 1),
+    }
+
+
+def compaction_report(model, X_train, X_test, y_test, step=STEP):
+    """
+    Return (report DataFrame, {variant name: classifier}); the full model is the first row.
+    Trees are ranked on the training rows so the test split only measures the result.
+    """
+    booster = model.get_booster()
+    booster = booster[:served_rounds(booster)]
+    model_json = booster_to_json(booster)
+    n_trees = booster.num_boosted_rounds()
+    ranking = np.argsort(-tree_contributions(booster, model_json, X_train), kind='stable')
+
+    variants = {'full': model}
+    for k in range(step, n_trees, step):
+        variants[f'truncated_{k}'] = json_to_classifier(select_trees(model_json, range(k)))
+        variants[f'pruned_{k}'] = json_to_classifier(select_trees(model_json, ranking[:k]))
+
+    rows = [evaluate_variant(name, m, X_test, y_test) for name, m in variants.items()]
+    report = pd.DataFrame(rows)
+    report['accuracy_loss'] = (report['accuracy'].iloc[0] - report['accuracy']).round(4)
+    return report, variants
+
+
+def choose_variant(report, max_loss=MAX_ACCURACY_LOSS):
+    """Fewest trees within the accuracy-loss budget; ties go to the more accurate variant."""
+    ok = report[report['accuracy_loss'] <= max_loss]
+    return ok.sort_values(['trees', 'accuracy'], ascending=[True, False]).iloc[0]['variant']
+
+
+# --- Main Execution ---
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate truncated/pruned variants and write a compact model.")
+    parser.add_argument("--csv", default=CSV_FILE)
+    parser.add_argument("--model-dir", default=".")
+    parser.add_argument("--max-accuracy-loss", type=float, default=MAX_ACCURACY_LOSS,
+                        help="Largest accepted drop in test accuracy (fraction, e.g. 0.005 = 0.5 pts)")
+    parser.add_argument("--step", type=int, default=STEP, help="Tree-count step between variants")
+    parser.add_argument("--publish", action="store_true", help="Publish the chosen model as the served model")
+    args = parser.parse_args()
+
+    from ml_model import save_model
+
+    # The published model with the encoders and scaler it was published with
+    model = load_pickle(os.path.join(args.model_dir, MODEL_FILE))
+    scaler = load_pickle(os.path.join(args.model_dir, SCALER_FILE))
+    label_encoders = load_pickle(os.path.join(args.model_dir, ENCODERS_FILE))
+
+    # Same seeded split as ml_model.py, encoded as at scoring time (no training noise)
+    df = pd.read_csv(args.csv)
+    X = encode_features(df, label_encoders, np.float64)
+    X_scaled = scaler.transform(X).astype(np.float32)
+    X_train, X_test, _, y_test = train_test_split(X_scaled, df[TARGET_COLUMN], test_size=0.2, random_state=42)
+
+    report, variants = compaction_report(model, X_train, X_test, y_test, args.step)
+    print(f"\n✂️ Compaction report ({len(X_test):,} test rows; latency = mean of {BENCH_REPEATS} calls)")
+    print(report.to_string(index=False))
+
+    chosen = choose_variant(report, args.max_accuracy_loss)
+    row = report.set_index('variant').loc[chosen]
+    full = report.iloc[0]
+    print(f"\n🏁 Chosen: {chosen} — {int(row['trees'])} of {int(full['trees'])} trees, "
+          f"accuracy {row['accuracy'] * 100:.2f}% (loss {row['accuracy_loss'] * 100:.2f} pts), "
+          f"{row['record_ms']:.3f} ms/record vs {full['record_ms']:.3f}")
+
+    compact = variants[chosen]
+    with open(os.path.join(args.model_dir, COMPACT_MODEL_FILE), 'wb') as f:
+        pickle.dump(compact, f)
+    with open(os.path.join(args.model_dir, COMPACTION_REPORT_FILE), 'w') as f:
+        json.dump({'chosen': chosen, 'max_accuracy_loss': args.max_accuracy_loss,
+                   'variants': report.to_dict('records')}, f, indent=2)
+    print(f"💾 Compact model saved to '{COMPACT_MODEL_FILE}', report to '{COMPACTION_REPORT_FILE}'")
+
+    if args.publish and chosen != 'full':
+        save_model(compact, scaler, label_encoders, X, args.model_dir)
+
+
+if __name__ == "__main__":
+    main()
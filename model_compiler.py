@@ -0,0 +1,153 @@
+# model_compiler.py
+#
+# Folds the fitted StandardScaler into the XGBoost split thresholds.
+# Tree splits are unchanged by a per-feature affine transform, so the
+# compiled model scores raw (label-encoded, unscaled) features directly.
+
+import json
+import sys
+import time
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from scoring import MODEL_FILE, SCALER_FILE, ENCODERS_FILE, load_pickle, encode_features
+from model_registry import publish_artifacts
+
+# --- Config ---
+CSV_FILE = 'combined_life_insurance_with_churn_reason.csv'
+BENCH_BATCH_SIZES = [1, 100, 1000]
+BENCH_REPEATS = 50
+
+
+# --- Booster JSON helpers ---
+def booster_to_json(booster):
+    return json.loads(booster.save_raw('json'))
+
+
+def json_to_classifier(model_json):
+    compiled = xgb.XGBClassifier()
+    compiled.load_model(bytearray(json.dumps(model_json).encode()))
+    return compiled
+
+
+def iter_split_nodes(model_json):
+    """Yield (tree, node) for every internal node; leaves keep their leaf value in split_conditions."""
+    for tree in model_json['learner']['gradient_booster']['model']['trees']:
+        for node, child in enumerate(tree['left_children']):
+            if child != -1:
+                yield tree, node
+
+
+# --- Threshold rewriting ---
+def scaler_params(scaler):
+    """(mean, scale) of a fitted StandardScaler, with identity defaults for disabled centring/scaling."""
+    mean = np.asarray(scaler.mean_, dtype=np.float64) if scaler.mean_ is not None else np.zeros(scaler.n_features_in_)
+    scale = np.asarray(scaler.scale_, dtype=np.float64) if scaler.scale_ is not None else np.ones(scaler.n_features_in_)
+    return mean, scale
+
+
+def _reference_values(X_reference, src, dst):
+    """Sorted unique raw values per feature, as float32 in the source and destination spaces."""
+    refs = []
+    for j in range(X_reference.shape[1]):
+        raw = np.unique(np.asarray(X_reference[:, j], dtype=np.float64))
+        src_values = ((raw - src[0][j]) / src[1][j]).astype(np.float32)
+        dst_values = ((raw - dst[0][j]) / dst[1][j]).astype(np.float32)
+        refs.append((src_values, dst_values))
+    return refs
+
+
+def _remap_threshold(threshold, j, src, dst, refs):
+    raw = float(threshold) * src[1][j] + src[0][j]
+    remapped = np.float32((raw - dst[0][j]) / dst[1][j])
+    if refs is None:
+        return remapped
+
+    # XGBoost sends x left when x < threshold. Snap the new threshold so every
+    # reference value lands on the same side it did before, which absorbs
+    # float32 rounding at thresholds that sit exactly on a data value.
+    src_values, dst_values = refs[j]
+    k = np.searchsorted(src_values, np.float32(threshold), side='left')
+    if k > 0 and remapped <= dst_values[k - 1]:
+        remapped = np.nextafter(dst_values[k - 1], np.float32(np.inf))
+    if k < len(dst_values) and remapped > dst_values[k]:
+        remapped = dst_values[k]
+    return remapped
+
+
+def remap_thresholds(model, src, dst, X_reference=None):
+    """
+    Return a copy of `model` trained on features scaled by src=(mean, scale)
+    that gives the same splits on features scaled by dst=(mean, scale).
+    X_reference (raw, encoded) pins the split side of every value seen in it.
+    """
+    refs = _reference_values(np.asarray(X_reference), src, dst) if X_reference is not None else None
+
+    model_json = booster_to_json(model.get_booster())
+    for tree, node in iter_split_nodes(model_json):
+        j = tree['split_indices'][node]
+        tree['split_conditions'][node] = float(_remap_threshold(tree['split_conditions'][node], j, src, dst, refs))
+    return json_to_classifier(model_json)
+
+
+def fold_scaler(model, scaler, X_reference=None):
+    """Return a copy of `model` whose thresholds are in raw feature units."""
+    n = scaler.n_features_in_
+    return remap_thresholds(model, scaler_params(scaler), (np.zeros(n), np.ones(n)), X_reference)
+
+
+# --- Parity check and benchmark ---
+def check_parity(model, scaler, compiled, X_raw):
+    X_scaled = scaler.transform(X_raw)
+    X_compiled = np.asarray(X_raw, dtype=np.float32)
+    pred_match = np.array_equal(model.predict(X_scaled), compiled.predict(X_compiled))
+    prob_diff = np.abs(model.predict_proba(X_scaled) - compiled.predict_proba(X_compiled)).max()
+    return pred_match, float(prob_diff)
+
+
+def benchmark(model, scaler, compiled, X_raw):
+    rows = []
+    for size in BENCH_BATCH_SIZES:
+        batch = X_raw.iloc[:size]
+
+        start = time.perf_counter()
+        for _ in range(BENCH_REPEATS):
+            model.predict_proba(scaler.transform(batch))
+        scaled_ms = (time.perf_counter() - start) / BENCH_REPEATS * 1000
+
+        start = time.perf_counter()
+        for _ in range(BENCH_REPEATS):
+            compiled.predict_proba(np.asarray(batch, dtype=np.float32))
+        compiled_ms = (time.perf_counter() - start) / BENCH_REPEATS * 1000
+
+        rows.append({"batch_size": size, "scaler+model_ms": round(scaled_ms, 3),
+                     "compiled_ms": round(compiled_ms, 3), "saved_ms": round(scaled_ms - compiled_ms, 3)})
+    return pd.DataFrame(rows)
+
+
+# --- Main Execution ---
+def compile_model(csv_file=CSV_FILE):
+    model = load_pickle(MODEL_FILE)
+    scaler = load_pickle(SCALER_FILE)
+    label_encoders = load_pickle(ENCODERS_FILE)
+
+    X_raw = encode_features(pd.read_csv(csv_file), label_encoders, np.float64)
+    compiled = fold_scaler(model, scaler, X_raw)
+
+    pred_match, prob_diff = check_parity(model, scaler, compiled, X_raw)
+    print(f"\n🔍 Parity on {len(X_raw):,} rows: predictions identical = {pred_match}, max |Δ probability| = {prob_diff:.2e}")
+    if not pred_match:
+        print("❌ Compiled model disagrees with scaler + model; not saving.")
+        sys.exit(1)
+
+    print("\n⏱️ Scoring time per batch")
+    print(benchmark(model, scaler, compiled, X_raw).to_string(index=False))
+
+    version = publish_artifacts(model, scaler, label_encoders, compiled)
+    print(f"\n💾 Compiled model published (version {version})")
+    return compiled
+
+
+if __name__ == "__main__":
+    compile_model(*sys.argv[1:2])
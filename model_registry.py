@@ -0,0 +1,287 @@
+# model_registry.py
+#
+# Per-process cache of the published model and preprocessors.
+# Artifacts are reloaded only when the files on disk change, and a reload
+# swaps the whole bundle at once so callers never mix old and new pieces.
+#
+# MultiModelRegistry serves several models side by side (one published
+# directory per product line / region under model_store/), loading each lazily
+# and evicting the least recently used when the memory budget is exceeded.
+# Batch entry point: python batch_score.py in.csv out.csv --route-column <column>
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from scoring import (MODEL_FILE, COMPILED_MODEL_FILE, SCALER_FILE, ENCODERS_FILE,
+                     encode_features, encode_matrix, model_input, scoring_dtype, training_features)
+
+# --- Config ---
+VERSION_FILE = "model_version.json"
+MODELS_DIR = "model_store"    # published artifacts only; models/ holds source code
+MODEL_MEMORY_BUDGET_MB = 512
+
+
+# --- Loaded model version ---
+class ModelBundle:
+    """A model, its preprocessors and the version id predictions are traced to."""
+
+    def __init__(self, model, scaler, label_encoders, version, signature, feature_names=None):
+        self.model = model
+        self.scaler = scaler
+        self.label_encoders = label_encoders
+        self.version = version
+        self.signature = signature
+        self.float_dtype = scoring_dtype(scaler)
+        # Training column order; every input is reindexed to it (None: the input's own order)
+        self.feature_names = feature_names
+
+    def encode(self, df):
+        return encode_features(df, self.label_encoders, self.float_dtype, self.feature_names)
+
+    def encode_matrix(self, df):
+        """Raw rows -> contiguous model matrix (no feature frame); see scoring.encode_matrix."""
+        return encode_matrix(df, self.label_encoders, self.float_dtype, self.feature_names)[0]
+
+    def predict(self, X):
+        return self.model.predict(model_input(X, self.scaler, self.feature_names))
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(model_input(X, self.scaler, self.feature_names))[:, 1]
+
+    @property
+    def schema(self):
+        """
+        Identifies the encoding; bundles with equal schemas can share one encoded matrix.
+        Covers the label codes, the column order and the float dtype (a scaler-backed
+        model must not score float32-rounded inputs encoded for a compiled one).
+        """
+        encoders = tuple((col, tuple(str(c) for c in le.classes_)) for col, le in sorted(self.label_encoders.items()))
+        names = None if self.feature_names is None else tuple(self.feature_names)
+        return encoders, names, np.dtype(self.float_dtype).str, self.scaler is not None
+
+    @property
+    def size_bytes(self):
+        """Approximate memory held: the on-disk size of the artifacts this bundle loaded."""
+        loaded = {COMPILED_MODEL_FILE if self.scaler is None else MODEL_FILE, SCALER_FILE, ENCODERS_FILE}
+        return sum(size for name, _, size in self.signature if name in loaded)
+
+
+# --- Registry ---
+class ModelRegistry:
+    def __init__(self, directory="."):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._bundle = None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _signature(self):
+        """(name, mtime_ns, size) of every artifact present; changes whenever a file is replaced."""
+        sig = []
+        for name in (VERSION_FILE, MODEL_FILE, COMPILED_MODEL_FILE, SCALER_FILE, ENCODERS_FILE):
+            try:
+                st = os.stat(self._path(name))
+            except FileNotFoundError:
+                continue
+            sig.append((name, st.st_mtime_ns, st.st_size))
+        return tuple(sig)
+
+    def _read(self, name):
+        with open(self._path(name), "rb") as f:
+            return f.read()
+
+    def _load(self, signature):
+        names = [name for name, _, _ in signature]
+        model_name = COMPILED_MODEL_FILE if COMPILED_MODEL_FILE in names else MODEL_FILE
+        blobs = {name: self._read(name) for name in (model_name, SCALER_FILE, ENCODERS_FILE)}
+
+        if VERSION_FILE in names:
+            # Published artifacts: refuse a half-finished publish and keep the current bundle
+            manifest = json.loads(self._read(VERSION_FILE))
+            for name, blob in blobs.items():
+                expected = manifest["files"].get(name)
+                if expected is not None and expected != hashlib.sha256(blob).hexdigest():
+                    return None
+            version = manifest["version"]
+        else:
+            version = content_version(blobs)
+
+        model = pickle.loads(blobs[model_name])
+        # A compiled model needs no scaler, but the scaler still records the training column order
+        fitted_scaler = pickle.loads(blobs[SCALER_FILE])
+        scaler = None if model_name == COMPILED_MODEL_FILE else fitted_scaler
+        label_encoders = pickle.loads(blobs[ENCODERS_FILE])
+        return ModelBundle(model, scaler, label_encoders, version, signature, training_features(fitted_scaler))
+
+    def get(self):
+        """Return the current bundle, reloading it if the artifacts changed on disk."""
+        signature = self._signature()
+        bundle = self._bundle
+        if bundle is not None and bundle.signature == signature:
+            return bundle
+
+        with self._lock:
+            if self._bundle is None or self._bundle.signature != signature:
+                loaded = self._load(signature)
+                if loaded is not None:
+                    self._bundle = loaded
+                elif self._bundle is None:
+                    raise RuntimeError("Model artifacts are being published; try again shortly.")
+            return self._bundle
+
+
+def content_version(blobs):
+    digest = hashlib.sha256()
+    for name in sorted(blobs):
+        digest.update(name.encode())
+        digest.update(blobs[name])
+    return digest.hexdigest()[:12]
+
+
+# --- Publishing ---
+def _atomic_write(path, blob):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(blob)
+    os.replace(tmp, path)
+
+
+def publish_artifacts(model, scaler, label_encoders, compiled=None, directory="."):
+    """
+    Write the artifacts atomically, then the version manifest last.
+    Registries treat artifacts that disagree with the manifest as mid-publish.
+    """
+    blobs = {
+        MODEL_FILE: pickle.dumps(model),
+        SCALER_FILE: pickle.dumps(scaler),
+        ENCODERS_FILE: pickle.dumps(label_encoders),
+    }
+    if compiled is not None:
+        blobs[COMPILED_MODEL_FILE] = pickle.dumps(compiled)
+    elif os.path.exists(os.path.join(directory, COMPILED_MODEL_FILE)):
+        # A compiled model from an older version would shadow the new one
+        os.remove(os.path.join(directory, COMPILED_MODEL_FILE))
+
+    os.makedirs(directory, exist_ok=True)
+    version = content_version(blobs)
+    for name, blob in blobs.items():
+        _atomic_write(os.path.join(directory, name), blob)
+
+    manifest = {
+        "version": version,
+        "published_at": datetime.now().isoformat(),
+        "files": {name: hashlib.sha256(blob).hexdigest() for name, blob in blobs.items()},
+    }
+    _atomic_write(os.path.join(directory, VERSION_FILE), json.dumps(manifest, indent=2).encode())
+    return version
+
+
+# --- Many models side by side ---
+class MultiModelRegistry:
+    """
+    Models published into subdirectories of `root` (publish_artifacts(..., directory="model_store/<name>")).
+    Each is loaded on first use and kept in an LRU; once the loaded artifacts exceed
+    `memory_budget_mb`, the least recently used models are dropped (and reloaded on next use).
+    """
+
+    def __init__(self, root=MODELS_DIR, memory_budget_mb=MODEL_MEMORY_BUDGET_MB, default=None):
+        self.root = root
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.default = default
+        self._lock = threading.Lock()
+        self._loaded = OrderedDict()      # name -> ModelRegistry, least recently used first
+        self.loads = 0
+        self.evictions = 0
+
+    def names(self):
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, VERSION_FILE)))
+
+    def memory_bytes(self):
+        return sum(registry._bundle.size_bytes for registry in self._loaded.values() if registry._bundle is not None)
+
+    def get(self, name):
+        with self._lock:
+            registry = self._loaded.get(name)
+            if registry is None:
+                directory = os.path.join(self.root, name)
+                if not os.path.exists(os.path.join(directory, VERSION_FILE)):
+                    raise KeyError(f"No published model '{name}' under '{self.root}'")
+                registry = ModelRegistry(directory)
+                self._loaded[name] = registry
+                self.loads += 1
+            self._loaded.move_to_end(name)
+            bundle = registry.get()
+
+            # Evict least recently used models (never the one just requested) until within budget
+            while len(self._loaded) > 1 and self.memory_bytes() > self.memory_budget:
+                self._loaded.popitem(last=False)
+                self.evictions += 1
+            return bundle
+
+    def resolve(self, routes):
+        """(codes, names): the model serving each route, as codes into names; unknown routes go to `default`."""
+        # A missing route is a name of its own: it goes to `default`, or raises like any unknown name
+        codes, names = pd.factorize(np.asarray(routes, dtype=object), use_na_sentinel=False)
+        names = np.array([str(name) for name in names], dtype=object)
+        if self.default is not None:
+            available = set(self.names())
+            names = np.array([name if name in available else self.default for name in names], dtype=object)
+        return codes, names
+
+    def predict_proba(self, df, routes):
+        """
+        Churn probability for each raw applicant row, scored by the model named in `routes`
+        (an array of model names, or the name of a column of `df`). Rows are grouped once:
+        one encode per distinct schema and one predict call per model.
+        """
+        codes, names = self.resolve(df[routes] if isinstance(routes, str) else routes)
+        bundles = [self.get(name) for name in names]
+
+        # Models sharing a schema share one encoded matrix
+        by_schema = {}
+        for code, bundle in enumerate(bundles):
+            by_schema.setdefault(bundle.schema, []).append(code)
+
+        proba = np.empty(len(df), dtype=np.float64)
+        for group in by_schema.values():
+            rows = np.flatnonzero(np.isin(codes, group))
+            X = bundles[group[0]].encode_matrix(df.iloc[rows])
+            row_codes = codes[rows]
+            order = np.argsort(row_codes, kind='stable')
+            bounds = np.searchsorted(row_codes[order], group + [group[-1] + 1])
+            for code, start, end in zip(group, bounds[:-1], bounds[1:]):
+                picked = order[start:end]
+                proba[rows[picked]] = bundles[code].predict_proba(X[picked])
+        return proba
+
+    def stats(self):
+        return {
+            'loaded': list(self._loaded),
+            'memory_mb': round(self.memory_bytes() / (1024 * 1024), 2),
+            'budget_mb': round(self.memory_budget / (1024 * 1024), 2),
+            'loads': self.loads,
+            'evictions': self.evictions,
+        }
+
+
+# --- Shared per-process registry ---
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(directory="."):
+    key = os.path.abspath(directory)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ModelRegistry(directory)
+        return _registries[key]
@@ -1,24 +1,44 @@
 # monitor_dashboard.py
+import os
+import time
 import streamlit as st
-import json
 import pandas as pd
 import altair as alt
+from dashboard_data import (LIVE_METRICS_FILE, LIVE_REFRESH_SECONDS, LIVE_WINDOWS, live_run_finished, load_live_metrics,
+                            load_system_metrics)
+from chart_reduction import downsample
+from drift_monitor import PSI_ALERT, load_drift_metrics
 
 st.set_page_config(page_title="System Monitor", layout="wide")
 
 st.title("📊 System Performance During MapReduce Execution")
 
-# Load data
+# Load data: the saved run is parsed once per change of the file; in live mode
+# (`monitor_runner.py --live`) each refresh parses only the newly appended samples
+live = st.toggle(f"🔴 Live (tail {LIVE_METRICS_FILE})", value=os.path.exists(LIVE_METRICS_FILE))
 try:
-    with open("system_metrics.json", "r") as f:
-        data = json.load(f)
-    df = pd.DataFrame(data)
+    df = load_live_metrics() if live else load_system_metrics()
 except FileNotFoundError:
-    st.error("system_metrics.json not found. Please run your job with monitoring.")
+    st.error(f"{LIVE_METRICS_FILE if live else 'system_metrics.json'} not found. Please run your job with monitoring.")
     st.stop()
+if df.empty:
+    if live_run_finished():
+        st.info("The live run finished without samples.")
+        st.stop()
+    st.info("⏳ Waiting for the first samples...")
+    time.sleep(LIVE_REFRESH_SECONDS)
+    st.rerun()
 
-# Convert timestamps
-df['timestamp'] = pd.to_datetime(df['timestamp'], format='%H:%M:%S')
+# Time window and downsampling: each chart gets at most MAX_SERIES_POINTS samples of the window
+start, end = df['timestamp'].min().to_pydatetime(), df['timestamp'].max().to_pydatetime()
+if live:
+    # A trailing window follows the newest samples
+    span = LIVE_WINDOWS[st.selectbox("Show", list(LIVE_WINDOWS))]
+    window = (max(start, end - span), end) if span else None
+else:
+    window = st.slider("Time window", start, end, (start, end), format="HH:mm:ss") if start < end else None
+method = st.radio("Downsampling", ['lttb', 'minmax'], horizontal=True,
+                  help="lttb keeps the shape of the line, minmax keeps every spike")
 
 # Layout
 col1, col2 = st.columns(2)
@@ -26,7 +46,7 @@ col1, col2 = st.columns(2)
 # 🔥 CPU Usage Chart
 with col1:
     st.subheader("🔥 CPU Usage Over Time")
-    chart = alt.Chart(df).mark_line().encode(
+    chart = alt.Chart(downsample(df, 'timestamp', 'cpu_usage', x_range=window, method=method)).mark_line().encode(
         x='timestamp:T',
         y='cpu_usage:Q',
         tooltip=['timestamp:T', 'cpu_usage:Q']
@@ -36,7 +56,7 @@ with col1:
 # 🧠 Memory Usage Chart
 with col2:
     st.subheader("🧠 Memory Usage Over Time")
-    chart = alt.Chart(df).mark_line(color='green').encode(
+    chart = alt.Chart(downsample(df, 'timestamp', 'memory_usage', x_range=window, method=method)).mark_line(color='green').encode(
         x='timestamp:T',
         y='memory_usage:Q',
         tooltip=['timestamp:T', 'memory_usage:Q']
@@ -45,7 +65,7 @@ with col2:
 
 # 💾 Disk Usage Chart
 st.subheader("💾 Disk Usage Over Time")
-chart = alt.Chart(df).mark_line(color='purple').encode(
+chart = alt.Chart(downsample(df, 'timestamp', 'disk_usage', x_range=window, method=method)).mark_line(color='purple').encode(
     x='timestamp:T',
     y='disk_usage:Q',
     tooltip=['timestamp:T', 'disk_usage:Q']
@@ -54,7 +74,7 @@ st.altair_chart(chart, use_container_width=True)
 
 # 🌡️ CPU Temperature Chart
 st.subheader("🌡️ CPU Temperature Over Time (Simulated)")
-chart = alt.Chart(df).mark_line(color='red').encode(
+chart = alt.Chart(downsample(df, 'timestamp', 'cpu_temp', x_range=window, method=method)).mark_line(color='red').encode(
     x='timestamp:T',
     y='cpu_temp:Q',
     tooltip=['timestamp:T', 'cpu_temp:Q']
@@ -62,3 +82,33 @@ chart = alt.Chart(df).mark_line(color='red').encode(
 st.altair_chart(chart, use_container_width=True)
 
 st.caption("Note: Temperature is simulated based on CPU load.")
+
+# 📈 Feature Drift (written by batch scoring, see drift_monitor.py)
+drift = pd.DataFrame(load_drift_metrics())
+if not drift.empty:
+    st.subheader("📈 Feature Drift vs. Training Data (PSI per scoring window)")
+    drift['window_end'] = pd.to_datetime(drift['window_end'])
+    lines = alt.Chart(drift).mark_line(point=True).encode(
+        x='window_end:T',
+        y='psi:Q',
+        color='feature:N',
+        tooltip=['window_end:T', 'feature:N', 'rows:Q', 'psi:Q', 'ks:Q']
+    )
+    threshold = alt.Chart(pd.DataFrame({'psi': [PSI_ALERT]})).mark_rule(color='red', strokeDash=[4, 4]).encode(y='psi:Q')
+    st.altair_chart((lines + threshold).interactive(), use_container_width=True)
+
+    latest = drift[drift['window_end'] == drift['window_end'].max()]
+    alerts = latest[latest['alert']]
+    if alerts.empty:
+        st.success("✅ No feature drifted past the PSI alert threshold in the latest window.")
+    else:
+        st.warning(f"⚠️ Drift in latest window: {', '.join(alerts['feature'])}")
+
+# 🔴 Live mode: refresh for the next samples until the run is over
+if live:
+    if live_run_finished():
+        st.caption(f"{len(df):,} samples | run finished")
+    else:
+        st.caption(f"{len(df):,} samples | refreshing every {LIVE_REFRESH_SECONDS}s")
+        time.sleep(LIVE_REFRESH_SECONDS)
+        st.rerun()
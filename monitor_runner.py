@@ -1,4 +1,8 @@
 # monitor_runner.py
+#
+# Usage:
+#   python monitor_runner.py          # sample for 30s next to the job, save system_metrics.json at the end
+#   python monitor_runner.py --live   # sample for the whole job, appending each sample to system_metrics.jsonl
 import threading
 import json
 import os
@@ -8,24 +12,33 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # ✅ Correct local imports
-from system_monitor import monitor_system
+from system_monitor import LIVE_METRICS_FILE, monitor_system
 from mapreduce.insurance_mapreduce import run_insurance_mapreduce
 
 system_metrics = []
+job_finished = threading.Event()
 
-def run_monitor():
+def run_monitor(live=False):
     global system_metrics
     print("\n🌡️ System monitoring started...")
-    system_metrics = monitor_system(interval=1, duration=30)
+    if live:
+        # Tailed by the dashboards (Live mode); starts empty for each run
+        open(LIVE_METRICS_FILE, 'w').close()
+        system_metrics = monitor_system(interval=1, duration=None, live_file=LIVE_METRICS_FILE, stop=job_finished)
+    else:
+        system_metrics = monitor_system(interval=1, duration=30)
     print("🌡️ System monitoring finished.")
 
-def run_job_with_monitoring():
+def run_job_with_monitoring(live=False):
     print("\n🛠️ Starting parallel system monitoring and insurance MapReduce job...\n")
 
-    monitor_thread = threading.Thread(target=run_monitor)
+    monitor_thread = threading.Thread(target=run_monitor, args=(live,))
     monitor_thread.start()
 
-    run_insurance_mapreduce()
+    try:
+        run_insurance_mapreduce()
+    finally:
+        job_finished.set()
 
     monitor_thread.join()
 
@@ -36,4 +49,4 @@ def run_job_with_monitoring():
     print("✅ Monitoring + MapReduce job complete.\n")
 
 if __name__ == "__main__":
-    run_job_with_monitoring()
+    run_job_with_monitoring(live="--live" in sys.argv[1:])
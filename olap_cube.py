@@ -0,0 +1,135 @@
+# olap_cube.py
+#
+# Pre-aggregated OLAP cube over the underwriting dimensions. Every non-empty
+# combination of dimension values holds additive aggregates (count, sum and
+# sum of squares of each measure), so any roll-up or slice is a filter plus
+# a group-by sum over the cube cells, never over applicant rows.
+#
+# Usage:
+#   python olap_cube.py [applicants.csv]   # build (chunked) and save the cube, then time a few queries
+
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from rules_engine import CREDIT_BRACKETS, INCOME_BRACKETS, MISSING_LABEL, bracket
+
+# --- Config ---
+CSV_FILE = 'combined_life_insurance_with_churn_reason.csv'
+CUBE_FILE = 'underwriting_cube.pkl'
+CHUNK_SIZE = 500_000
+
+DIMENSIONS = ['city_tier', 'smoker', 'existing_conditions', 'income_bracket', 'credit_bracket',
+              'policy_term_years', 'underwriting_decision', 'application_channel']
+MEASURES = ['Churn', 'risk_aversion_score', 'previous_claims', 'coverage_amount', 'income', 'credit_score']
+
+
+# --- Build ---
+def cube_dimensions(df):
+    """The dimension columns of raw applicant rows, with income/credit mapped to their brackets."""
+    dims = pd.DataFrame(index=df.index)
+    for dim in DIMENSIONS:
+        if dim == 'income_bracket':
+            dims[dim] = bracket(df['income'], INCOME_BRACKETS)
+        elif dim == 'credit_bracket':
+            dims[dim] = bracket(df['credit_score'], CREDIT_BRACKETS)
+        elif df[dim].dtype.kind in 'iuf':
+            dims[dim] = df[dim]
+        else:
+            dims[dim] = df[dim].astype(object).fillna(MISSING_LABEL)
+    return dims
+
+
+def aggregate(df):
+    """Cube cells (one row per non-empty dimension combination) for a batch of raw rows."""
+    dims = cube_dimensions(df)
+    values = {'count': np.ones(len(df), dtype=np.int64)}
+    for m in MEASURES:
+        x = df[m].to_numpy(dtype=np.float64)
+        values[f'{m}_sum'] = x
+        values[f'{m}_sumsq'] = x * x
+    cells = pd.concat([dims, pd.DataFrame(values, index=df.index)], axis=1)
+    return cells.groupby(DIMENSIONS, observed=True, sort=False).sum()
+
+
+def merge_cells(parts):
+    """Cells are additive, so partial cubes (e.g. per chunk) merge by summing equal keys."""
+    return pd.concat(parts).groupby(level=DIMENSIONS, observed=True, sort=False).sum()
+
+
+def build_cube(csv_file=CSV_FILE, chunk_size=CHUNK_SIZE):
+    parts = [aggregate(chunk) for chunk in pd.read_csv(csv_file, chunksize=chunk_size)]
+    cube = merge_cells(parts).reset_index()
+    for dim in DIMENSIONS:
+        if cube[dim].dtype == object:
+            cube[dim] = cube[dim].astype('category')
+    return cube
+
+
+def save_cube(cube, path=CUBE_FILE):
+    with open(path, 'wb') as f:
+        pickle.dump(cube, f)
+
+
+def load_cube(path=CUBE_FILE):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+# --- Query ---
+def query(cube, by=(), filters=None):
+    """
+    Roll up `cube` to the dimensions in `by`, keeping only cells matching `filters`
+    ({dimension: value or list of values}). Returns count, mean and std per measure, and churn_rate.
+    """
+    cells = cube
+    if filters:
+        mask = np.ones(len(cube), dtype=bool)
+        for dim, wanted in filters.items():
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            mask &= cube[dim].isin(list(wanted)).to_numpy()
+        cells = cube[mask]
+
+    sums = cells.drop(columns=DIMENSIONS)
+    if by:
+        sums = pd.concat([cells[list(by)], sums], axis=1).groupby(list(by), observed=True).sum()
+    else:
+        sums = sums.sum().to_frame('all').T
+
+    out = pd.DataFrame({'count': sums['count'].astype(np.int64)}, index=sums.index)
+    n = sums['count'].where(sums['count'] > 0)
+    for m in MEASURES:
+        mean = sums[f'{m}_sum'] / n
+        out[f'{m}_mean'] = mean
+        # Sample std (ddof=1, as pandas) from the additive sums
+        out[f'{m}_std'] = np.sqrt(np.maximum(sums[f'{m}_sumsq'] - n * mean ** 2, 0) / (n - 1))
+    out['churn_rate'] = out.pop('Churn_mean')
+    out = out.drop(columns='Churn_std')
+    return out.reset_index() if by else out
+
+
+# --- Main Execution ---
+def main(csv_file=CSV_FILE):
+    start = time.perf_counter()
+    cube = build_cube(csv_file)
+    save_cube(cube)
+    print(f"\n🧊 Cube: {len(cube):,} cells over {int(cube['count'].sum()):,} applicants "
+          f"in {time.perf_counter() - start:.2f}s → '{CUBE_FILE}'")
+
+    examples = [
+        ("Churn by city tier, smokers only", ['city_tier'], {'smoker': 'Yes'}),
+        ("Decisions by income & credit bracket", ['income_bracket', 'credit_bracket', 'underwriting_decision'], None),
+        ("Claims by policy term, agent channel", ['policy_term_years'], {'application_channel': 'Agent'}),
+    ]
+    for title, by, filters in examples:
+        start = time.perf_counter()
+        result = query(cube, by, filters)
+        print(f"\n📐 {title} ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        print(result.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -1,18 +1,19 @@
 # predict_single.py
+#
+# One applicant is encoded straight into a 1-row matrix (scoring.encode_record),
+# so this path builds no DataFrame. Import time is dominated by xgboost and
+# scikit-learn, which unpickling the model needs (python import_budget.py prediction.py).
 
-import pickle
-import numpy as np
-import pandas as pd
+import os
 
-# --- Load model and preprocessing tools ---
-with open("underwriting_model.pkl", "rb") as f:
-    model = pickle.load(f)
-
-with open("scaler.pkl", "rb") as f:
-    scaler = pickle.load(f)
+from drift_monitor import DRIFT_WINDOW_FILE, open_monitor
+from model_registry import get_registry
+from scoring import encode_record
+from what_if import WhatIfEngine, set_value, shift
 
-with open("label_encoders.pkl", "rb") as f:
-    label_encoders = pickle.load(f)
+# --- Load model and preprocessing tools ---
+bundle = get_registry().get()
+label_encoders = bundle.label_encoders
 
 # --- Define a customer likely to NOT churn ---
 new_customer = {
@@ -40,31 +41,39 @@ new_customer = {
     'phone_contact_frequency': 15
 }
 
-# --- Convert to DataFrame ---
-df = pd.DataFrame([new_customer])
-
 # --- Encode categorical features using saved encoders ---
-for col in df.select_dtypes(include='object').columns:
-    if col in label_encoders:
-        le = label_encoders[col]
-        if df[col].iloc[0] in le.classes_:
-            df[col] = le.transform(df[col])
-        else:
-            # Handle unseen label by assigning most common class (safe fallback)
-            print(f"⚠️ Unseen label '{df[col].iloc[0]}' in column '{col}', using fallback.")
-            default_val = le.transform([le.classes_[0]])[0]
-            df[col] = default_val
-    else:
-        df[col] = df[col].astype('category').cat.codes
+for col, le in label_encoders.items():
+    if col in new_customer and str(new_customer[col]) not in {str(c) for c in le.classes_}:
+        # Unseen labels fall back to the encoder's first class
+        print(f"⚠️ Unseen label '{new_customer[col]}' in column '{col}', using fallback.")
+X, columns = encode_record(new_customer, label_encoders, bundle.float_dtype, bundle.feature_names)
 
-# --- Scale numerical features ---
-X_scaled = scaler.transform(df)
+# --- Predict churn (scaling is skipped when the scaler is folded into the model) ---
+prediction = bundle.predict(X)[0]
+probability = bundle.predict_proba(X)[0]
 
-# --- Predict churn ---
-prediction = model.predict(X_scaled)[0]
-probability = model.predict_proba(X_scaled)[0][1]
+# --- Drift: add this applicant to the model directory's open window ---
+drift = open_monitor(get_registry().directory)
+if drift is not None:
+    window_path = os.path.join(get_registry().directory, DRIFT_WINDOW_FILE)
+    drift.load_window(window_path)
+    drift.observe(X, columns)
+    drift.save_window(window_path)
 
 # --- Output results ---
 result = "Churn" if prediction == 1 else "Not Churn"
 print(f"\n🔮 Prediction: {result}")
 print(f"📊 Probability of churn: {probability * 100:.2f}%")
+print(f"🏷️ Model version: {bundle.version}")
+
+# --- What-if: the same customer under a few changes, scored in one batch ---
+scenarios = [
+    ('credit_score +50', [shift('credit_score', 50)]),
+    ('credit_score -150', [shift('credit_score', -150)]),
+    ('starts smoking', [set_value('smoker', 'Yes')]),
+    ('income halved', [shift('income', -new_customer['income'] / 2)]),
+]
+what_if = bundle.predict_proba(WhatIfEngine(bundle).scenario_matrix(X, columns, scenarios))
+print("\n🔀 What-if churn probabilities:")
+for scenario, p in zip(['baseline'] + [name for name, _ in scenarios], what_if):
+    print(f"   {scenario:<18} {p * 100:6.2f}%")
@@ -0,0 +1,129 @@
+# prediction_cache.py
+#
+# Content-addressed cache of model outputs for repeated applicant profiles.
+# Keys hash the encoded feature vector together with the model version, so a
+# republished model never serves stale results. Entries live in a bounded LRU
+# in memory, with an optional SQLite tier on disk shared across processes.
+
+import hashlib
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# --- Config ---
+MAX_MEMORY_ENTRIES = 200_000
+
+
+def row_keys(X, model_version, namespace="proba"):
+    """One stable 16-byte key per row of the encoded feature matrix (hashed in the model input's precision)."""
+    X = np.asarray(X)
+    X = np.ascontiguousarray(X, dtype=np.float64 if X.dtype == np.float64 else np.float32)
+    prefix = f"{namespace}:{model_version}:".encode()
+    return [hashlib.blake2b(prefix + row.tobytes(), digest_size=16).digest() for row in X]
+
+
+class PredictionCache:
+    def __init__(self, max_entries=MAX_MEMORY_ENTRIES, disk_path=None):
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache (key BLOB PRIMARY KEY, value BLOB)")
+            self._db.commit()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """Return (values, miss_positions); values[i] is None for every miss."""
+        values = [None] * len(keys)
+        pending = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                value = self._memory.get(key)
+                if value is None:
+                    pending.append(i)
+                else:
+                    self._memory.move_to_end(key)
+                    values[i] = value
+            self.hits += len(keys) - len(pending)
+
+            if pending and self._db is not None:
+                found = {}
+                wanted = [keys[i] for i in pending]
+                for start in range(0, len(wanted), 500):
+                    part = wanted[start:start + 500]
+                    marks = ",".join("?" * len(part))
+                    found.update(self._db.execute(f"SELECT key, value FROM cache WHERE key IN ({marks})", part))
+                still_missing = []
+                for i in pending:
+                    blob = found.get(keys[i])
+                    if blob is None:
+                        still_missing.append(i)
+                    else:
+                        values[i] = pickle.loads(blob)
+                        self._remember(keys[i], values[i])
+                self.disk_hits += len(pending) - len(still_missing)
+                pending = still_missing
+
+            self.misses += len(pending)
+        return values, pending
+
+    def put_many(self, keys, values):
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._remember(key, value)
+            if self._db is not None:
+                self._db.executemany("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                                     [(key, pickle.dumps(value)) for key, value in zip(keys, values)])
+                self._db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            'memory_entries': len(self._memory),
+        }
+
+
+# --- Batch scoring through the cache ---
+def predict_proba_cached(bundle, X, cache):
+    """Churn probabilities for encoded rows X; only cache misses reach the model."""
+    keys = row_keys(X, bundle.version)
+    values, misses = cache.get_many(keys)
+    if misses:
+        fresh = bundle.predict_proba(X.iloc[misses] if hasattr(X, 'iloc') else np.asarray(X)[misses])
+        fresh = [float(p) for p in fresh]
+        cache.put_many([keys[i] for i in misses], fresh)
+        for i, p in zip(misses, fresh):
+            values[i] = p
+    return np.array(values, dtype=np.float64)
+
+
+# --- Shared per-process cache ---
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache(disk_path=None):
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PredictionCache(disk_path=disk_path)
+        return _cache
@@ -0,0 +1,176 @@
+# rules_engine.py
+#
+# Declarative underwriting rules compiled into vectorized masks over a batch,
+# combined with the XGBoost churn probability into Approved / Review / Rejected.
+# Hard rules decide an applicant outright; the model is only run for rows no
+# hard rule has decided.
+#
+# Usage:
+#   python rules_engine.py [rows]   # benchmark on the dataset tiled to `rows` applicants
+
+import operator
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# --- Config ---
+APPROVED, REVIEW, REJECTED = 'Approved', 'Review', 'Rejected'
+MISSING_LABEL = 'None'       # read_csv parses the literal 'None' (no existing conditions) as NaN
+
+# Brackets used by the MapReduce underwriting analysis: income < 30000 / < 70000, credit < 500 / < 700
+INCOME_BRACKETS = ([30000, 70000], ['low', 'med', 'high'])
+CREDIT_BRACKETS = ([500, 700], ['poor', 'fair', 'good'])
+
+# Hard rules, in priority order: (name, [(field, op, value), ...] all of which must hold, outcome)
+HARD_RULES = [
+    ('poor_credit_repeat_claims', [('credit_score', '<', 500), ('previous_claims', '>=', 2)], REJECTED),
+    ('high_cover_low_income', [('coverage_amount', '>', 8_000_000), ('income', '<', 300_000)], REVIEW),
+    ('smoker_serious_condition', [('smoker', '==', 'Yes'), ('existing_conditions', 'in', ['Heart Disease', 'Cancer'])], REVIEW),
+    ('prime_applicant', [('credit_score', '>=', 750), ('smoker', '==', 'No'),
+                         ('existing_conditions', '==', 'None'), ('income', '>=', 700_000)], APPROVED),
+]
+
+# Churn risk points, as assigned by dataset.py: (name, [(field, op, value)], points)
+CHURN_SCORE_RULES = [
+    ('poor_credit', [('credit_score', '<', 500)], 1),
+    ('smoker', [('smoker', '==', 'Yes')], 1),
+    ('existing_condition', [('existing_conditions', '!=', 'None')], 1),
+    ('low_income', [('income', '<', 300000)], 1),
+    ('low_risk_aversion', [('risk_aversion_score', '<', 4)], 1),
+    ('low_internet_usage', [('internet_usage_hours', '<', 2)], 1),
+    ('rare_phone_contact', [('phone_contact_frequency', '<', 5)], 1),
+    ('tier_3_city', [('city_tier', '==', 'Tier 3')], 1),
+]
+
+OPS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '==': operator.eq, '!=': operator.ne,
+    'in': lambda col, values: np.isin(col, list(values)),
+    'not in': lambda col, values: ~np.isin(col, list(values)),
+}
+
+
+# --- Compilation ---
+def _column(df, field):
+    col = df[field]
+    if col.dtype == object or pd.api.types.is_string_dtype(col):
+        return col.fillna(MISSING_LABEL).to_numpy(dtype=object)
+    return col.to_numpy()
+
+
+def compile_conditions(conditions):
+    """Turn [(field, op, value), ...] into one function: DataFrame -> boolean mask (AND of all)."""
+    compiled = []
+    for field, op, value in conditions:
+        if op not in OPS:
+            raise ValueError(f"Unknown operator '{op}' in rule on '{field}'")
+        compiled.append((field, OPS[op], value))
+
+    def mask(df, columns=None):
+        # `columns` memoizes extracted columns across the rules of one evaluation
+        columns = {} if columns is None else columns
+        result = np.ones(len(df), dtype=bool)
+        for field, fn, value in compiled:
+            if field not in columns:
+                columns[field] = _column(df, field)
+            result &= np.asarray(fn(columns[field], value), dtype=bool)
+        return result
+
+    return mask
+
+
+def bracket(values, brackets):
+    """Vectorized bracket labels, e.g. bracket(df['income'], INCOME_BRACKETS)."""
+    edges, labels = brackets
+    return np.asarray(labels, dtype=object)[np.searchsorted(edges, np.asarray(values, dtype=float), side='right')]
+
+
+def score_points(df, score_rules=CHURN_SCORE_RULES):
+    points = np.zeros(len(df), dtype=np.int16)
+    columns = {}
+    for _, conditions, weight in score_rules:
+        points += compile_conditions(conditions)(df, columns).astype(np.int16) * weight
+    return points
+
+
+# --- Engine ---
+class RuleEngine:
+    def __init__(self, hard_rules=HARD_RULES, score_rules=CHURN_SCORE_RULES,
+                 approve_below=0.35, reject_above=0.75, review_points=4):
+        self.hard_rules = [(name, compile_conditions(conds), outcome) for name, conds, outcome in hard_rules]
+        self.score_rules = [(name, compile_conditions(conds), weight) for name, conds, weight in score_rules]
+        self.approve_below = approve_below
+        self.reject_above = reject_above
+        self.review_points = review_points
+
+    def evaluate(self, df, bundle=None):
+        """
+        Decide every applicant in `df` (raw columns).
+        Returns decision, decided_by, risk_points and churn_probability (NaN where a hard rule decided).
+        """
+        n = len(df)
+        decision = np.full(n, None, dtype=object)
+        decided_by = np.full(n, 'model', dtype=object)
+        undecided = np.ones(n, dtype=bool)
+        columns = {}
+
+        for name, mask_fn, outcome in self.hard_rules:
+            hit = undecided & mask_fn(df, columns)
+            decision[hit] = outcome
+            decided_by[hit] = name
+            undecided &= ~hit
+
+        points = np.zeros(n, dtype=np.int16)
+        for _, mask_fn, weight in self.score_rules:
+            points += mask_fn(df, columns).astype(np.int16) * weight
+
+        proba = np.full(n, np.nan)
+        rows = np.flatnonzero(undecided)
+        if len(rows):
+            if bundle is None:
+                # Rules only: risk points alone decide between Approved and Review
+                decision[rows] = np.where(points[rows] >= self.review_points, REVIEW, APPROVED)
+                decided_by[rows] = 'risk_points'
+            else:
+                batch = df.iloc[rows]
+                proba[rows] = bundle.predict_proba(bundle.encode(batch))
+                p = proba[rows]
+                decision[rows] = np.where(p >= self.reject_above, REJECTED,
+                                          np.where((p >= self.approve_below) | (points[rows] >= self.review_points),
+                                                   REVIEW, APPROVED))
+
+        return pd.DataFrame({
+            'decision': decision,
+            'decided_by': decided_by,
+            'risk_points': points,
+            'churn_probability': proba,
+        }, index=df.index)
+
+
+# --- Benchmark ---
+def benchmark(rows=1_000_000, csv_file='combined_life_insurance_with_churn_reason.csv'):
+    from model_registry import get_registry
+
+    base = pd.read_csv(csv_file)
+    df = pd.concat([base] * (rows // len(base) + 1), ignore_index=True).iloc[:rows]
+    engine = RuleEngine()
+
+    start = time.perf_counter()
+    engine.evaluate(df)
+    rules_only = time.perf_counter() - start
+    print(f"\n📏 Rules only: {rows:,} applicants in {rules_only:.2f}s")
+
+    bundle = get_registry().get()
+    start = time.perf_counter()
+    result = engine.evaluate(df, bundle)
+    combined = time.perf_counter() - start
+    skipped = (result['decided_by'] != 'model').mean()
+    print(f"🤖 Rules + model: {rows:,} applicants in {combined:.2f}s "
+          f"({skipped:.1%} decided by hard rules, model skipped for them)")
+    print(result['decision'].value_counts().to_string())
+
+
+if __name__ == "__main__":
+    benchmark(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,222 @@
+# scoring.py
+#
+# Usage:
+#   python scoring.py [rows]   # peak-RSS benchmark: float64 frames vs. the compact scoring path
+
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+# --- Artifacts ---
+MODEL_FILE = "underwriting_model.pkl"
+COMPILED_MODEL_FILE = "underwriting_model_compiled.pkl"
+SCALER_FILE = "scaler.pkl"
+ENCODERS_FILE = "label_encoders.pkl"
+
+# --- Columns that never reach the model ---
+DROP_COLUMNS = ['application_id', 'churn_reason']
+TARGET_COLUMN = 'Churn'
+
+
+def load_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+# --- Compact dtypes ---
+def code_dtype(n_classes):
+    """Smallest signed integer dtype holding label codes 0..n_classes-1."""
+    return np.int8 if n_classes <= 127 else np.int16 if n_classes <= 32767 else np.int32
+
+
+def scoring_dtype(scaler):
+    """
+    Float dtype to encode numerics in: float64 for a model behind a scaler (fitted
+    on float64 values; float32 would move values across its split thresholds),
+    float32 for a compiled model, whose splits are float32 anyway.
+    """
+    return np.float32 if scaler is None else np.float64
+
+
+def compact_numeric(values, float_dtype=np.float32):
+    """Integers downcast to the smallest int type, floats to float_dtype."""
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_numeric(values, downcast='integer')
+    return values.astype(float_dtype)
+
+
+def encode_column(values, label_encoder):
+    """
+    Label codes for one raw column (object, str or category dtype), as int8/int16.
+    Unseen labels fall back to the encoder's first class, as in the dashboards;
+    missing values map to 'nan', as astype(str) made them at training time.
+    """
+    classes = pd.Index([str(c) for c in label_encoder.classes_])
+    values = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype('category')
+    # One lookup per distinct category instead of one per row; slot -1 is for missing values
+    lookup = np.append(classes.get_indexer(values.cat.categories.astype(str)), classes.get_indexer(['nan']))
+    lookup[lookup < 0] = 0
+    return lookup[values.cat.codes.to_numpy()].astype(code_dtype(len(classes)))
+
+
+def encode_label(value, label_encoder):
+    """Code of one raw value, with the same fallbacks as encode_column (missing -> 'nan', unseen -> 0)."""
+    classes = [str(c) for c in label_encoder.classes_]
+    label = 'nan' if value is None or (isinstance(value, float) and np.isnan(value)) else str(value)
+    return classes.index(label) if label in classes else 0
+
+
+def read_applicants(path_or_buffer, label_encoders, float_dtype=np.float32, **kwargs):
+    """read_csv straight into compact dtypes: categoricals as category, numerics downcast (floats to float_dtype)."""
+    df = pd.read_csv(path_or_buffer, dtype={col: 'category' for col in label_encoders}, **kwargs)
+    for col in df.select_dtypes(include='number').columns:
+        df[col] = compact_numeric(df[col], float_dtype)
+    return df
+
+
+def training_features(scaler):
+    """Feature names in the order the model was trained on (the scaler's fitted columns), or None."""
+    names = getattr(scaler, 'feature_names_in_', None)
+    return None if names is None else [str(n) for n in names]
+
+
+# --- Encode categorical features using saved encoders ---
+def _feature_columns(columns, feature_names=None):
+    """
+    Model columns of raw input with these columns, in training order when
+    feature_names is given. Raises ValueError on missing or unexpected features:
+    the order is all the model sees once the names are dropped.
+    """
+    columns = [c for c in columns if c not in DROP_COLUMNS + [TARGET_COLUMN]]
+    if feature_names is None:
+        return columns
+    missing = [c for c in feature_names if c not in columns]
+    unexpected = [c for c in columns if c not in feature_names]
+    if missing or unexpected:
+        raise ValueError(f"Input does not match the model's features: missing {missing}, unexpected {unexpected}")
+    return list(feature_names)
+
+
+def _encode(values, label_encoders, col, float_dtype=np.float32):
+    if col in label_encoders:
+        return encode_column(values, label_encoders[col])
+    if pd.api.types.is_numeric_dtype(values):
+        return compact_numeric(values, float_dtype).to_numpy()
+    return values.astype('category').cat.codes.to_numpy()
+
+
+def encode_features(df, label_encoders, float_dtype=np.float32, feature_names=None):
+    """
+    Return the model feature frame for raw applicant rows, in compact dtypes
+    (int8/int16 label codes, downcast integers, float_dtype floats; see scoring_dtype).
+    Columns follow feature_names when given (see _feature_columns).
+    """
+    columns = _feature_columns(df.columns, feature_names)
+    return pd.DataFrame({col: _encode(df[col], label_encoders, col, float_dtype) for col in columns}, index=df.index)
+
+
+def encode_matrix(df, label_encoders, dtype=np.float32, feature_names=None):
+    """
+    Encode raw rows straight into one C-contiguous matrix (float32, or float64 for
+    the scaler path), column by column, with no intermediate feature frame.
+    Columns follow feature_names when given. Returns (matrix, feature_names).
+    """
+    columns = _feature_columns(df.columns, feature_names)
+    X = np.empty((len(df), len(columns)), dtype=dtype)
+    for j, col in enumerate(columns):
+        X[:, j] = _encode(df[col], label_encoders, col, dtype)
+    return X, columns
+
+
+def encode_record(record, label_encoders, dtype=np.float32, feature_names=None):
+    """
+    One raw applicant (dict) -> (1 x F matrix, feature_names), as encode_matrix
+    would encode it, without building a DataFrame.
+    """
+    columns = _feature_columns(record, feature_names)
+    X = np.empty((1, len(columns)), dtype=dtype)
+    for j, col in enumerate(columns):
+        value = record[col]
+        if col in label_encoders:
+            X[0, j] = encode_label(value, label_encoders[col])
+        else:
+            # A single unencoded string is category code 0, as in _encode
+            X[0, j] = 0 if isinstance(value, str) else value
+    return X, columns
+
+
+# --- Served model ---
+def served_rounds(booster):
+    """Rounds the booster predicts with: an early-stopped model serves only best_iteration + 1."""
+    best = booster.attr('best_iteration')
+    return booster.num_boosted_rounds() if best is None else int(best) + 1
+
+
+# --- Model input ---
+def model_input(X, scaler=None, feature_names=None):
+    """
+    Matrix passed to model.predict: scaled for the original model, raw float32 for a compiled one.
+    A feature frame must have its columns in training order (feature_names, default the scaler's).
+    """
+    names = feature_names if feature_names is not None else training_features(scaler)
+    if hasattr(X, 'columns') and names is not None and list(X.columns) != list(names):
+        raise ValueError("Feature frame columns are not in the model's training order")
+    if scaler is not None:
+        # The scaler was fitted in float64: X must already hold float64 numerics
+        # (see scoring_dtype), a float32 matrix cannot get its lost precision back
+        return scaler.transform(np.asarray(X, dtype=np.float64))
+    # No copy when X already is a contiguous float32 matrix (see encode_matrix)
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+# --- Memory benchmark ---
+def _tile(df, rows):
+    return pd.concat([df] * (rows // len(df) + 1), ignore_index=True).iloc[:rows]
+
+
+def _score_legacy(csv_file, rows):
+    """The previous dashboard path: default read_csv dtypes, int64 codes, float64 X_scaled, original model."""
+    model, scaler, label_encoders = load_pickle(MODEL_FILE), load_pickle(SCALER_FILE), load_pickle(ENCODERS_FILE)
+    df = _tile(pd.read_csv(csv_file), rows)
+    df = df.drop(columns=DROP_COLUMNS, errors='ignore')
+    for col in label_encoders:
+        # Same int64 result as the old apply + le.transform loop, without its per-row Python cost
+        df[col] = encode_column(df[col], label_encoders[col]).astype(np.int64)
+    X_scaled = scaler.transform(df.drop(columns=[TARGET_COLUMN], errors='ignore'))
+    return model.predict_proba(X_scaled)[:, 1]
+
+
+def _score_compact(csv_file, rows):
+    from model_registry import get_registry
+
+    bundle = get_registry().get()
+    df = _tile(read_applicants(csv_file, bundle.label_encoders, bundle.float_dtype), rows)
+    return bundle.predict_proba(bundle.encode_matrix(df))
+
+
+def benchmark_memory(rows=10_000_000, csv_file='combined_life_insurance_with_churn_reason.csv'):
+    """Run each path in a fresh process so peak RSS is not shared between them."""
+    print(f"\n🧮 Peak RSS scoring {rows:,} rows (fresh process per path):")
+    for mode in ('legacy', 'compact'):
+        out = subprocess.run([sys.executable, __file__, '--run', mode, str(rows), csv_file],
+                             capture_output=True, text=True)
+        if out.returncode != 0:
+            print(f"   {mode:<8} ❌ failed (exit {out.returncode}): {out.stderr.strip().splitlines()[-1:]}")
+        else:
+            print(f"   {mode:<8} {out.stdout.strip()}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--run']:
+        import time
+        from streaming_training import peak_memory_mb
+
+        mode, rows, csv_file = sys.argv[2], int(sys.argv[3]), sys.argv[4]
+        start = time.perf_counter()
+        proba = (_score_legacy if mode == 'legacy' else _score_compact)(csv_file, rows)
+        print(f"{peak_memory_mb():>8,.0f} MB peak, {time.perf_counter() - start:.1f}s, mean p={proba.mean():.4f}")
+    else:
+        benchmark_memory(*(int(a) for a in sys.argv[1:2]))
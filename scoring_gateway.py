@@ -0,0 +1,285 @@
+# scoring_gateway.py
+#
+# Asyncio-native scoring API. Callers await `gateway.score(applicant)`; the
+# request waits in a bounded queue, a batcher groups queued requests into
+# micro-batches and scores them on a CPU executor, and each caller's future
+# is resolved with its churn probability.
+#
+# Backpressure: when the queue is full, `submit` raises GatewayOverloaded
+# immediately, and requests that waited longer than `max_queue_wait_ms` are
+# shed rather than scored late. At most `workers` batches run at once.
+#
+# Scored batches feed the model directory's drift monitor (see drift_monitor.py).
+#
+# Usage:
+#   python scoring_gateway.py [requests] [concurrency]   # load test, prints the metrics
+
+import asyncio
+import bisect
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from drift_monitor import open_monitor
+from model_registry import get_registry
+
+# --- Config ---
+MAX_QUEUE = 10_000
+MAX_BATCH = 512
+MAX_BATCH_WAIT_MS = 5
+MAX_QUEUE_WAIT_MS = 2_000
+WORKERS = 2
+
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+
+
+class GatewayOverloaded(Exception):
+    """The request was rejected (queue full) or shed (waited too long in the queue)."""
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] holds values <= bounds[i], the last slot the overflow."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bucket bound holding the q-th quantile (inf when it falls in the overflow slot)."""
+        if self.total == 0:
+            return 0.0
+        rank, seen = q * self.total, 0
+        for bound, count in zip(self.bounds + [float('inf')], self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        labels = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'count': self.total,
+            'mean': round(self.sum / self.total, 3) if self.total else 0.0,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+        }
+
+
+class ScoringGateway:
+    def __init__(self, model_dir=".", max_queue=MAX_QUEUE, max_batch=MAX_BATCH,
+                 max_batch_wait_ms=MAX_BATCH_WAIT_MS, max_queue_wait_ms=MAX_QUEUE_WAIT_MS,
+                 workers=WORKERS, executor=None):
+        self.registry = get_registry(model_dir)
+        self.max_batch = max_batch
+        self.max_batch_wait = max_batch_wait_ms / 1000
+        self.max_queue_wait = max_queue_wait_ms / 1000
+        self.max_queue = max_queue
+        self.workers = workers
+        self.executor = executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scoring")
+        # Histograms are computed on the executor, merged on the event loop
+        self.drift = open_monitor(model_dir)
+
+        self.queue = None
+        self._slots = None
+        self._batcher = None
+        self._running = set()
+
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.shed = 0
+        self.failed = 0
+
+    # --- Lifecycle ---
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.create_task(self._run())
+        return self
+
+    async def stop(self):
+        """
+        Stop taking batches, then wait for the batches already running. Requests
+        the batcher held and requests still queued fail with GatewayOverloaded.
+        """
+        if self._batcher is not None:
+            batcher, self._batcher = self._batcher, None
+            batcher.cancel()
+            await asyncio.gather(batcher, return_exceptions=True)
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        while self.queue is not None and not self.queue.empty():
+            self._fail([self.queue.get_nowait()], GatewayOverloaded("gateway stopped"))
+        if self.drift is not None:
+            self.drift.flush()
+
+    @staticmethod
+    def _fail(items, exc):
+        for _, future, _ in items:
+            if not future.done():
+                future.set_exception(exc)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    # --- Client API ---
+    def submit(self, applicant):
+        """
+        Queue one applicant (dict of raw fields) and return a future for its churn probability.
+        Raises GatewayOverloaded right away when the queue is full.
+        """
+        if self._batcher is None:
+            raise GatewayOverloaded("gateway not running")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((applicant, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise GatewayOverloaded(f"scoring queue full ({self.max_queue} requests)") from None
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return future
+
+    async def score(self, applicant):
+        return await self.submit(applicant)
+
+    # --- Batching ---
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_batch_wait
+        try:
+            while len(batch) < self.max_batch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                # Poll instead of wait_for(queue.get()), whose timeout can drop an item it just dequeued
+                await asyncio.sleep(min(remaining, 0.001))
+        except asyncio.CancelledError:
+            # Stopped mid-batch: these requests are off the queue, fail them here or they never resolve
+            self._fail(batch, GatewayOverloaded("gateway stopped"))
+            raise
+        return batch
+
+    async def _run(self):
+        while True:
+            # Take a batch only when an executor slot is free, so the queue (not
+            # the executor) absorbs bursts and overload turns into rejections
+            await self._slots.acquire()
+            try:
+                batch = await self._next_batch()
+            except BaseException:
+                self._slots.release()
+                raise
+
+            now = time.perf_counter()
+            live = []
+            for applicant, future, queued_at in batch:
+                if future.cancelled():
+                    continue
+                if now - queued_at > self.max_queue_wait:
+                    self.shed += 1
+                    future.set_exception(GatewayOverloaded("request shed after waiting in the queue"))
+                else:
+                    live.append((applicant, future, queued_at))
+
+            if not live:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._dispatch(live))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _dispatch(self, batch):
+        try:
+            self.batch_sizes.observe(len(batch))
+            loop = asyncio.get_running_loop()
+            try:
+                proba, counts = await loop.run_in_executor(self.executor, self._score_batch, [a for a, _, _ in batch])
+            except Exception as exc:
+                self.failed += len(batch)
+                self._fail(batch, exc)
+                return
+
+            done = time.perf_counter()
+            for (_, future, queued_at), p in zip(batch, proba):
+                if not future.done():
+                    future.set_result(float(p))
+                self.latency_ms.observe((done - queued_at) * 1000)
+            self.completed += len(batch)
+            if counts is not None:
+                self.drift.add_counts(counts, len(batch))
+        finally:
+            self._slots.release()
+
+    def _score_batch(self, applicants):
+        # Runs on the executor; the registry hands out the current model version
+        bundle = self.registry.get()
+        X = bundle.encode_matrix(pd.DataFrame(applicants))
+        counts = self.drift.bin_counts(X, bundle.feature_names) if self.drift is not None else None
+        return bundle.predict_proba(X), counts
+
+    # --- Metrics ---
+    def metrics(self):
+        return {
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'max_queue_depth': self.max_queue_depth,
+            'running_batches': len(self._running),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'shed': self.shed,
+            'failed': self.failed,
+            'batch_size': self.batch_sizes.snapshot(),
+            'latency_ms': self.latency_ms.snapshot(),
+        }
+
+
+# --- Load test ---
+async def load_test(total=20_000, concurrency=2_000, csv_file='combined_life_insurance_with_churn_reason.csv'):
+    applicants = pd.read_csv(csv_file).drop(columns=['Churn'], errors='ignore').to_dict('records')
+    sem = asyncio.Semaphore(concurrency)
+    outcomes = {'ok': 0, 'overloaded': 0}
+
+    async with ScoringGateway() as gateway:
+        async def client(i):
+            async with sem:
+                try:
+                    await gateway.score(applicants[i % len(applicants)])
+                    outcomes['ok'] += 1
+                except GatewayOverloaded:
+                    outcomes['overloaded'] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+        metrics = gateway.metrics()
+
+    print(f"\n⚡ {total:,} requests, {concurrency:,} concurrent: {outcomes['ok']:,} scored, "
+          f"{outcomes['overloaded']:,} rejected/shed in {elapsed:.2f}s ({outcomes['ok'] / elapsed:,.0f} req/sec)")
+    print(f"📦 Batch size: mean {metrics['batch_size']['mean']}, p50 <= {metrics['batch_size']['p50']}, "
+          f"p99 <= {metrics['batch_size']['p99']}")
+    print(f"⏱️ Latency: mean {metrics['latency_ms']['mean']} ms, p50 <= {metrics['latency_ms']['p50']} ms, "
+          f"p99 <= {metrics['latency_ms']['p99']} ms")
+    print(f"📥 Max queue depth: {metrics['max_queue_depth']:,}")
+    return metrics
+
+
+if __name__ == "__main__":
+    asyncio.run(load_test(*(int(a) for a in sys.argv[1:3])))
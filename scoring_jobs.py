@@ -0,0 +1,205 @@
+# scoring_jobs.py
+#
+# Local background job queue for dashboard uploads. An upload is submitted as
+# a scoring job identified by the hash of its bytes and the model version; a
+# worker pool reads, encodes, scores and explains it in chunks while the page
+# polls the job's progress. Finished jobs stay in memory (bounded LRU), so
+# reruns and other sessions get the result back without rescoring.
+#
+# Usage:
+#   python scoring_jobs.py [applicants.csv]   # submit twice, show progress and the memoized resubmit
+
+import hashlib
+import io
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from evaluation import EvaluationAccumulator
+from explanations import ExplanationEngine
+from model_registry import get_registry
+from prediction_cache import get_prediction_cache, predict_proba_cached
+from scoring import read_applicants
+
+# --- Config ---
+WORKERS = 2
+CHUNK_ROWS = 50_000
+MAX_FINISHED_JOBS = 16
+POLL_SECONDS = 0.5        # how often the dashboards re-check a running job
+
+
+def upload_id(data, model_version):
+    """Job id of an upload: same bytes under the same model version -> same job."""
+    return hashlib.blake2b(f"{model_version}:".encode() + data, digest_size=16).hexdigest()
+
+
+class ScoringJob:
+    def __init__(self, job_id, size_bytes):
+        self.id = job_id
+        self.size_bytes = size_bytes
+        self.status = 'queued'        # queued -> running -> done | failed
+        self.stage = 'queued'
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.evaluation = None        # EvaluationAccumulator, updated per chunk while scoring labeled uploads
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.status in ('done', 'failed')
+
+
+def score_upload(job, data, bundle, cache):
+    """
+    Read, encode, score and explain an uploaded CSV, updating job.stage / job.progress.
+    The returned frames are shared between sessions: treat them as read-only.
+    """
+    job.stage = 'reading'
+    df = read_applicants(io.BytesIO(data), bundle.label_encoders, bundle.float_dtype)
+    preview = df.head()
+    true_churn = df['Churn'] if 'Churn' in df.columns else None
+    scored = bundle.encode(df)
+    features = scored.drop(columns=['Churn'], errors='ignore')
+    n = len(features)
+
+    # Scoring and explanations each account for half of the progress bar
+    job.stage = 'scoring'
+    proba = np.empty(n, dtype=np.float64)
+    labels = true_churn.to_numpy() if true_churn is not None else None
+    if labels is not None:
+        job.evaluation = EvaluationAccumulator()
+    for start in range(0, n, CHUNK_ROWS):
+        chunk = proba[start:start + CHUNK_ROWS]
+        chunk[:] = predict_proba_cached(bundle, features.iloc[start:start + CHUNK_ROWS], cache)
+        if labels is not None:
+            chunk_labels = labels[start:start + CHUNK_ROWS]
+            labeled = ~pd.isna(chunk_labels)
+            job.evaluation.update(chunk_labels[labeled], chunk[labeled])
+        job.progress = 0.5 * min(start + CHUNK_ROWS, n) / max(n, 1)
+
+    job.stage = 'explaining'
+    engine = ExplanationEngine(bundle, cache)
+    parts = []
+    for start in range(0, n, CHUNK_ROWS):
+        parts.append(engine.reason_codes(features.iloc[start:start + CHUNK_ROWS]))
+        job.progress = 0.5 + 0.5 * min(start + CHUNK_ROWS, n) / max(n, 1)
+    reasons = pd.concat(parts) if parts else engine.reason_codes(features)
+    reasons.insert(0, 'Churn_Probability', proba)
+
+    scored['Predicted_Churn'] = (proba > 0.5).astype('int8')
+    result = {'preview': preview, 'scored': scored, 'proba': proba, 'reasons': reasons,
+              'model_version': bundle.version, 'confusion': None, 'report': None, 'summary': None}
+    if true_churn is not None:
+        scored['Churn'] = true_churn
+        result['confusion'] = job.evaluation.confusion_matrix()
+        result['report'] = pd.DataFrame(job.evaluation.classification_report()).transpose()
+        result['summary'] = job.evaluation.summary()
+    return result
+
+
+class ScoringJobQueue:
+    def __init__(self, model_dir=".", workers=WORKERS, max_finished=MAX_FINISHED_JOBS):
+        self.registry = get_registry(model_dir)
+        self.max_finished = max_finished
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scoring-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.memo_hits = 0
+
+    def submit(self, data):
+        """Return the job for these upload bytes, starting one unless it is already queued, running or done."""
+        bundle = self.registry.get()
+        job_id = upload_id(data, bundle.version)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status != 'failed':
+                self._jobs.move_to_end(job_id)
+                self.memo_hits += 1
+                return job
+            job = ScoringJob(job_id, len(data))
+            self._jobs[job_id] = job
+            self._evict()
+        self.executor.submit(self._run, job, data, bundle)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _evict(self):
+        # Only finished jobs are dropped, oldest first; queued and running jobs always stay
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job, data, bundle):
+        # Other threads read the job without a lock: fill in every field a status
+        # implies (timestamps, result, error) before publishing that status
+        job.started_at = time.time()
+        job.status = job.stage = 'running'
+        try:
+            result = score_upload(job, data, bundle, get_prediction_cache())
+        except Exception as exc:
+            job.error = f"{type(exc).__name__}: {exc}"
+            job.finished_at = time.time()
+            job.status = job.stage = 'failed'
+        else:
+            job.result = result
+            job.progress = 1.0
+            job.finished_at = time.time()
+            job.status = job.stage = 'done'
+        finally:
+            with self._lock:
+                self._evict()
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in ('queued', 'running', 'done', 'failed')} | {
+            'memo_hits': self.memo_hits}
+
+
+# --- Shared per-process queue ---
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_job_queue(model_dir="."):
+    with _queues_lock:
+        if model_dir not in _queues:
+            _queues[model_dir] = ScoringJobQueue(model_dir)
+        return _queues[model_dir]
+
+
+# --- Demo ---
+def demo(csv_file='combined_life_insurance_with_churn_reason.csv'):
+    with open(csv_file, 'rb') as f:
+        data = f.read()
+    queue = get_job_queue()
+
+    start = time.perf_counter()
+    job = queue.submit(data)
+    while not job.done:
+        print(f"⏳ {job.id[:8]} {job.stage:<10} {job.progress:6.1%}")
+        time.sleep(POLL_SECONDS)
+    if job.status == 'failed':
+        print(f"❌ Job failed: {job.error}")
+        return
+    print(f"\n✅ Scored {len(job.result['scored']):,} rows in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    again = queue.submit(data)
+    print(f"♻️ Resubmitted the same upload: same job = {again is job}, "
+          f"result in {(time.perf_counter() - start) * 1000:.1f} ms | {queue.stats()}")
+
+
+if __name__ == "__main__":
+    demo(*sys.argv[1:2])
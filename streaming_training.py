@@ -0,0 +1,225 @@
+# streaming_training.py
+#
+# External-memory training for datasets larger than RAM.
+# Pass 1 streams the file once to learn encoder vocabularies and scaler
+# statistics. Pass 2 feeds scaled chunks to XGBoost through a DataIter, so
+# only one chunk is in Python memory at a time.
+
+import os
+import resource
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from scoring import DROP_COLUMNS, TARGET_COLUMN, encode_features
+
+# --- Config ---
+CHUNK_SIZE = 200_000
+HOLDOUT_EVERY = 5          # every 5th row is held out for evaluation (~20%, like the in-memory split)
+REFERENCE_ROWS = 200_000   # uniform row sample kept in pass 1: drift profile and threshold snapping
+SAMPLE_SEED = 42
+NOISE_COLUMNS = ['income', 'credit_score', 'bmi', 'risk_aversion_score']
+BOOST_ROUNDS = 100
+PARAMS = {
+    'objective': 'binary:logistic',
+    'eval_metric': 'logloss',
+    'tree_method': 'hist',
+    'max_depth': 3,
+    'learning_rate': 0.05,
+    'subsample': 0.6,
+    'colsample_bytree': 0.6,
+    'reg_alpha': 4,
+    'reg_lambda': 2,
+    'gamma': 2,
+}
+
+
+def peak_memory_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if os.uname().sysname == 'Darwin' else rss / 1024
+
+
+# --- Chunk sources ---
+def iter_chunks(path, chunk_size=CHUNK_SIZE):
+    """Yield DataFrame chunks from a CSV file or a Parquet columnar cache."""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+# --- Pass 1: streaming vocabularies and scaler statistics ---
+class RunningMoments:
+    """Per-column count/mean/M2, merged chunk by chunk (Chan et al.)."""
+
+    def __init__(self, n_features):
+        self.n = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    def update(self, X):
+        n_b = X.shape[0]
+        if n_b == 0:
+            return
+        mean_b = X.mean(axis=0)
+        m2_b = ((X - mean_b) ** 2).sum(axis=0)
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * n_b / n
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.n * n_b / n
+        self.n = n
+
+    @property
+    def var(self):
+        return self.m2 / max(self.n, 1)
+
+
+def fit_streaming_preprocessors(path, chunk_size=CHUNK_SIZE, reference_rows=REFERENCE_ROWS):
+    """
+    Return (label_encoders, scaler, feature_columns, reference) equivalent to fitting on the whole file.
+    Categorical moments come from per-category counts, since codes are only known once the vocabulary is.
+    reference is a uniform sample of up to reference_rows rows of the whole file, encoded.
+    """
+    vocab, cat_counts, feature_columns, categorical = {}, {}, None, None
+    moments = None
+    rng = np.random.default_rng(SAMPLE_SEED)
+    sample = None
+
+    for chunk in iter_chunks(path, chunk_size):
+        chunk = chunk.drop(columns=DROP_COLUMNS + [TARGET_COLUMN], errors='ignore')
+        if feature_columns is None:
+            feature_columns = list(chunk.columns)
+            categorical = list(chunk.select_dtypes(include='object').columns)
+            numeric = [c for c in feature_columns if c not in categorical]
+            moments = RunningMoments(len(numeric))
+            vocab = {c: set() for c in categorical}
+            cat_counts = {c: {} for c in categorical}
+
+        for col in categorical:
+            counts = chunk[col].fillna('nan').astype(str).value_counts()
+            vocab[col].update(counts.index)
+            for value, count in counts.items():
+                cat_counts[col][value] = cat_counts[col].get(value, 0) + int(count)
+        moments.update(chunk[numeric].to_numpy(dtype=np.float64))
+
+        # Keep the rows with the smallest random keys seen so far: a uniform sample of the
+        # file however it is ordered, without knowing its length up front
+        keyed = chunk.assign(_key=rng.random(len(chunk)))
+        sample = keyed if sample is None else pd.concat([sample, keyed])
+        sample = sample.nsmallest(reference_rows, '_key')
+
+    label_encoders = {}
+    for col in categorical:
+        le = LabelEncoder()
+        le.classes_ = np.array(sorted(vocab[col]), dtype=object)
+        label_encoders[col] = le
+
+    # Assemble a StandardScaler in the original column order
+    mean, var = np.zeros(len(feature_columns)), np.zeros(len(feature_columns))
+    for j, col in enumerate(feature_columns):
+        if col in label_encoders:
+            codes = np.arange(len(label_encoders[col].classes_), dtype=np.float64)
+            weights = np.array([cat_counts[col][v] for v in label_encoders[col].classes_], dtype=np.float64)
+            mean[j] = np.average(codes, weights=weights)
+            var[j] = np.average((codes - mean[j]) ** 2, weights=weights)
+        else:
+            k = numeric.index(col)
+            mean[j], var[j] = moments.mean[k], moments.var[k]
+
+    scaler = StandardScaler()
+    scaler.mean_ = mean
+    scaler.var_ = var
+    scaler.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+    scaler.n_samples_seen_ = moments.n
+    scaler.n_features_in_ = len(feature_columns)
+    scaler.feature_names_in_ = np.array(feature_columns, dtype=object)
+
+    reference = encode_features(sample.drop(columns='_key').sort_index(), label_encoders, np.float64, feature_columns)
+    return label_encoders, scaler, feature_columns, reference
+
+
+# --- Pass 2: chunk iterator for XGBoost ---
+def split_chunk(chunk, offset, label_encoders, scaler, add_noise=False):
+    """Encode and scale one chunk; return (X_train, y_train, X_holdout, y_holdout)."""
+    y = chunk[TARGET_COLUMN].to_numpy()
+    X = encode_features(chunk, label_encoders, np.float64, list(scaler.feature_names_in_))
+    if add_noise:
+        # Seeded by the chunk's position: XGBoost iterates more than once (quantile sketch,
+        # then the cached pages), and every pass must see the same values
+        rng = np.random.default_rng(offset)
+        for col in NOISE_COLUMNS:
+            if col in X.columns:
+                X[col] = X[col] * (1 + rng.normal(0, 0.015, size=len(X)))
+    X = scaler.transform(X).astype(np.float32)
+    holdout = (np.arange(offset, offset + len(chunk)) % HOLDOUT_EVERY) == 0
+    return X[~holdout], y[~holdout], X[holdout], y[holdout]
+
+
+class ChunkIter(xgb.DataIter):
+    def __init__(self, path, label_encoders, scaler, chunk_size=CHUNK_SIZE, cache_prefix=None):
+        self.path = path
+        self.label_encoders = label_encoders
+        self.scaler = scaler
+        self.chunk_size = chunk_size
+        self._chunks = None
+        self._offset = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        self._chunks = None
+        self._offset = 0
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_chunks(self.path, self.chunk_size)
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        X_train, y_train, _, _ = split_chunk(chunk, self._offset, self.label_encoders, self.scaler, add_noise=True)
+        self._offset += len(chunk)
+        input_data(data=X_train, label=y_train)
+        return True
+
+
+def evaluate_holdout(booster, path, label_encoders, scaler, chunk_size=CHUNK_SIZE):
+    correct = total = 0
+    offset = 0
+    for chunk in iter_chunks(path, chunk_size):
+        _, _, X_hold, y_hold = split_chunk(chunk, offset, label_encoders, scaler)
+        offset += len(chunk)
+        if len(y_hold):
+            proba = booster.inplace_predict(X_hold)
+            correct += int(((proba > 0.5) == y_hold).sum())
+            total += len(y_hold)
+    return correct / max(total, 1), total
+
+
+# --- Main Execution ---
+def train_external_memory(path, chunk_size=CHUNK_SIZE, rounds=BOOST_ROUNDS):
+    """Train from `path` without loading it whole. Returns (booster, label_encoders, scaler, reference, accuracy)."""
+    start = time.perf_counter()
+    label_encoders, scaler, _, reference = fit_streaming_preprocessors(path, chunk_size)
+    print(f"\n📐 Pass 1 (vocabularies + scaler stats): {scaler.n_samples_seen_:,} rows in "
+          f"{time.perf_counter() - start:.1f}s | peak RSS {peak_memory_mb():,.0f} MB")
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        it = ChunkIter(path, label_encoders, scaler, chunk_size, cache_prefix=os.path.join(cache_dir, 'cache'))
+        if hasattr(xgb, 'ExtMemQuantileDMatrix'):
+            dtrain = xgb.ExtMemQuantileDMatrix(it)
+        else:
+            dtrain = xgb.DMatrix(it)
+        booster = xgb.train(PARAMS, dtrain, num_boost_round=rounds)
+        del dtrain
+    print(f"🌲 Pass 2 (external-memory training, {rounds} rounds): {time.perf_counter() - start:.1f}s | "
+          f"peak RSS {peak_memory_mb():,.0f} MB")
+
+    acc, n_hold = evaluate_holdout(booster, path, label_encoders, scaler, chunk_size)
+    print(f"\n✅ Holdout Accuracy: {acc * 100:.2f}% on {n_hold:,} rows | peak RSS {peak_memory_mb():,.0f} MB")
+    return booster, label_encoders, scaler, reference, acc
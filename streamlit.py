@@ -1,9 +1,8 @@
 import streamlit as st
-import json
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
+from dashboard_data import load_mapreduce_results
 
 # Page setup
 st.set_page_config(
@@ -14,22 +13,19 @@ st.set_page_config(
 
 st.title("📊 Insurance Underwriting MapReduce Analysis Dashboard")
 
-# Load JSON results
-@st.cache_data
+# Load tidy result tables (cached until the results file changes on disk)
 def load_results():
     try:
-        with open("insurance_mapreduce_results.json") as f:
-            return json.load(f)
+        return load_mapreduce_results()
     except Exception as e:
         st.error(f"Failed to load data: {e}")
-        return None
+        return None, None
 
 # Load data
-results_data = load_results()
+results_data, tables = load_results()
 if not results_data:
     st.stop()
 
-results = results_data["analysis_results"]
 st.markdown(f"**📅 Timestamp:** {results_data['timestamp']} | **🔢 Rows Processed:** {results_data['row_count']:,}")
 
 # Sidebar Filters
@@ -37,12 +33,7 @@ st.sidebar.header("🧭 Dashboard Controls")
 
 # ---------- 1. Churn by City Tier ----------
 st.header("1️⃣ Churn Reason by City Tier")
-churn_data = []
-for key, value in results.items():
-    if key.startswith("churn_by_city_"):
-        *_, city, churn = key.split("_")
-        churn_data.append({"City Tier": city, "Churn Reason": churn, "Count": value})
-churn_df = pd.DataFrame(churn_data)
+churn_df = tables["churn_by_city"]
 
 selected_cities = st.sidebar.multiselect("City Tiers", churn_df["City Tier"].unique(), default=churn_df["City Tier"].unique())
 selected_reasons = st.sidebar.multiselect("Churn Reasons", churn_df["Churn Reason"].unique(), default=churn_df["Churn Reason"].unique())
@@ -58,12 +49,7 @@ with col2:
 
 # ---------- 2. Risk Score by Smoker & Conditions ----------
 st.header("2️⃣ Risk Score by Smoker & Conditions")
-risk_data = []
-for key, value in results.items():
-    if key.startswith("risk_by_health_"):
-        _, _, smoker, condition = key.split("_", 3)
-        risk_data.append({"Smoker": smoker, "Condition": condition, "Average Risk Score": value})
-risk_df = pd.DataFrame(risk_data)
+risk_df = tables["risk_by_health"]
 
 selected_smoker = st.sidebar.radio("Smoker Type", sorted(risk_df["Smoker"].unique()), index=0)
 risk_df = risk_df[risk_df["Smoker"] == selected_smoker]
@@ -78,12 +64,7 @@ with col4:
 
 # ---------- 3. Underwriting by Income & Credit Score ----------
 st.header("3️⃣ Underwriting by Income & Credit Score")
-uw_data = []
-for key, value in results.items():
-    if key.startswith("underwriting_"):
-        _, income, credit, decision = key.split("_", 3)
-        uw_data.append({"Income Bracket": income, "Credit Bracket": credit, "Decision": decision.capitalize(), "Count": value})
-uw_df = pd.DataFrame(uw_data)
+uw_df = tables["underwriting"]
 
 income_selected = st.sidebar.multiselect("Income Brackets", uw_df["Income Bracket"].unique(), default=uw_df["Income Bracket"].unique())
 credit_selected = st.sidebar.multiselect("Credit Score Brackets", uw_df["Credit Bracket"].unique(), default=uw_df["Credit Bracket"].unique())
@@ -106,16 +87,7 @@ with col6:
 
 # ---------- 4. Claims by Policy Term ----------
 st.header("4️⃣ Claims by Policy Term")
-claims_data = []
-for key, value in results.items():
-    if key.startswith("claims_by_term_"):
-        term = key.split("_")[-1]
-        claims_data.append({
-            "Policy Term (Years)": int(term),
-            "Total Claims": value["total_claims"],
-            "Average Claims": value["average_claims"]
-        })
-claims_df = pd.DataFrame(claims_data).sort_values("Policy Term (Years)")
+claims_df = tables["claims_by_term"]
 
 term_range = st.sidebar.slider("Policy Term Filter (Years)", min_value=int(claims_df["Policy Term (Years)"].min()),
                                 max_value=int(claims_df["Policy Term (Years)"].max()),
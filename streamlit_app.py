@@ -1,21 +1,9 @@
 # streamlit_app.py
 
+import time
 import streamlit as st
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-import pickle
-from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.preprocessing import LabelEncoder
-import plotly.express as px
-
-# --- Load trained model and preprocessors ---
-with open("underwriting_model.pkl", "rb") as f:
-    model = pickle.load(f)
-with open("scaler.pkl", "rb") as f:
-    scaler = pickle.load(f)
-with open("label_encoders.pkl", "rb") as f:
-    label_encoders = pickle.load(f)
+from chart_reduction import density_scatter
 
 st.set_page_config(page_title="Underwriting Result Dashboard", layout="wide")
 st.title("📊 Automated Underwriting Engine - Streamlit Dashboard")
@@ -23,74 +11,85 @@ st.title("📊 Automated Underwriting Engine - Streamlit Dashboard")
 uploaded_file = st.file_uploader("📥 Upload the life insurance dataset (no predictions needed)", type=["csv"])
 
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
+    # Model, scoring and plotting libraries load on the first upload, not at page load
+    from model_registry import get_registry
+    from prediction_cache import get_prediction_cache
+    from scoring_jobs import POLL_SECONDS, get_job_queue
+
+    # --- Score in the background: read, encode (compact dtypes), predict and explain run in a worker ---
+    # The job id is the hash of the upload and the model version, so reruns and
+    # other sessions with the same file get the finished result immediately
+    job = get_job_queue().submit(uploaded_file.getvalue())
+    if not job.done:
+        st.progress(job.progress, text=f"⏳ Scoring job {job.id[:8]}: {job.stage}...")
+        if job.evaluation is not None and job.evaluation.rows:
+            # Metrics so far, from the counts merged chunk by chunk
+            live = job.evaluation.summary()
+            st.caption(f"Scored so far: {live['rows']:,} labeled rows | accuracy {live['accuracy']:.2%} | "
+                       f"F1 {live['f1']:.3f} | ROC AUC {live['roc_auc']:.3f}")
+        time.sleep(POLL_SECONDS)
+        st.rerun()
+    if job.status == 'failed':
+        st.error(f"❌ Scoring job {job.id[:8]} failed: {job.error}")
+        st.stop()
+
+    result = job.result
+    df = result['scored']          # shared with other sessions: read-only
 
     st.subheader("📄 Raw Dataset Preview")
-    st.dataframe(df.head())
+    st.dataframe(result['preview'])
 
-    # --- Save original churn column if exists ---
-    true_churn = df['Churn'] if 'Churn' in df.columns else None
-
-    # --- Drop unused columns ---
-    df = df.drop(columns=['application_id', 'churn_reason'], errors='ignore')
-
-    # --- Encode categorical features using saved label encoders ---
-    for col in df.select_dtypes(include='object').columns:
-        if col in label_encoders:
-            le = label_encoders[col]
-            df[col] = df[col].apply(lambda x: x if x in le.classes_ else le.classes_[0])
-            df[col] = le.transform(df[col])
-        else:
-            df[col] = df[col].astype('category').cat.codes
-
-    # --- Scale features ---
-    X_scaled = scaler.transform(df.drop(columns=['Churn'], errors='ignore'))
-
-    # --- Predict with model ---
-    predicted = model.predict(X_scaled)
-    df['Predicted_Churn'] = predicted
-
-    # --- Add actual churn column if available ---
-    if true_churn is not None:
-        df['Churn'] = true_churn
+    # --- Evaluation against the actual churn column, if the upload has one ---
+    if result['confusion'] is not None:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
 
         st.markdown("### 📊 Confusion Matrix")
-        cm = confusion_matrix(df['Churn'], df['Predicted_Churn'])
         fig, ax = plt.subplots()
-        sns.heatmap(cm, annot=True, fmt='d', cmap="Blues", xticklabels=['Not Churn', 'Churn'], yticklabels=['Not Churn', 'Churn'])
+        sns.heatmap(result['confusion'], annot=True, fmt='d', cmap="Blues", xticklabels=['Not Churn', 'Churn'], yticklabels=['Not Churn', 'Churn'])
         st.pyplot(fig)
 
         st.markdown("### 🧠 Classification Report")
-        report = classification_report(df['Churn'], df['Predicted_Churn'], output_dict=True)
-        st.dataframe(pd.DataFrame(report).transpose())
+        st.dataframe(result['report'])
+        st.caption(f"Log loss {result['summary']['log_loss']:.4f} | ROC AUC {result['summary']['roc_auc']:.4f} "
+                   f"({result['summary']['rows']:,} labeled rows)")
 
     # --- Feature Importance ---
     st.markdown("### 📌 Feature Importance")
     feature_names = df.drop(columns=['Predicted_Churn', 'Churn'], errors='ignore').columns
-    importances = pd.Series(model.feature_importances_, index=feature_names)
+    importances = pd.Series(get_registry().get().model.feature_importances_, index=feature_names)
     st.bar_chart(importances.sort_values(ascending=False))
 
+    # --- Per-applicant reasons (feature contributions, computed by the scoring job) ---
+    st.markdown("### 🧾 Top Reasons per Applicant (highest churn risk first)")
+    st.dataframe(result['reasons'].sort_values('Churn_Probability', ascending=False).head(500))
+
     # --- Interactive Scatter Plot ---
     st.markdown("### 🎯 Interactive Scatter Plot by Prediction")
 
-    numerical_cols = df.select_dtypes(include=['int64', 'float64']).columns.drop(['Predicted_Churn'], errors='ignore')
+    numerical_cols = df.select_dtypes(include='number').columns.drop(['Predicted_Churn'], errors='ignore')
     x_axis = st.selectbox("Select X-axis", numerical_cols, index=0)
     y_axis = st.selectbox("Select Y-axis", numerical_cols, index=1)
 
-    fig = px.scatter(
-        df,
-        x=x_axis,
-        y=y_axis,
-        color=df['Predicted_Churn'].map({0: "Not Churn", 1: "Churn"}),
-        symbol='Predicted_Churn',
-        title=f"{x_axis} vs {y_axis} (Colored by Prediction)",
-        labels={'color': 'Prediction'},
-        hover_data=['Predicted_Churn']
-    )
+    # Only binned counts reach the browser for large uploads; narrow the ranges to zoom in with finer bins
+    ranges = {}
+    for axis, col in (("X", x_axis), ("Y", y_axis)):
+        lo, hi = float(df[col].min()), float(df[col].max())
+        if lo < hi:
+            ranges[axis] = st.slider(f"{axis} range ({col})", lo, hi, (lo, hi), key=f"scatter_{axis}_{col}")
+
+    points = pd.DataFrame({x_axis: df[x_axis], y_axis: df[y_axis],
+                           'Prediction': df['Predicted_Churn'].map({0: "Not Churn", 1: "Churn"})})
+    fig = density_scatter(points, x_axis, y_axis, 'Prediction', ranges.get("X"), ranges.get("Y"),
+                          title=f"{x_axis} vs {y_axis} (Colored by Prediction)")
     st.plotly_chart(fig, use_container_width=True)
 
     # --- Downloadable Result ---
-    st.download_button("📥 Download Results CSV", df.to_csv(index=False), file_name="predicted_churn_results.csv")
+    cache_stats = get_prediction_cache().stats()
+    st.caption(f"Model version: {result['model_version']} | Job {job.id[:8]} scored in "
+               f"{job.finished_at - job.started_at:.1f}s | Prediction cache hit rate: {cache_stats['hit_rate']:.1%}")
+    st.download_button("📥 Download Results CSV", df.assign(Model_Version=result['model_version']).to_csv(index=False),
+                       file_name="predicted_churn_results.csv")
 
 else:
     st.info("👆 Please upload a clean dataset (same as used during training).")
@@ -1,35 +1,62 @@
 # system_monitor.py
+import json
 import psutil
 import time
 from datetime import datetime
 
-def monitor_system(interval=1, duration=30):
+LIVE_METRICS_FILE = 'system_metrics.jsonl'
+
+def sample(now):
+    """One reading of CPU, memory, disk usage and temperature, stamped with the time of day of `now`."""
+    cpu_usage = psutil.cpu_percent(interval=None)
+    memory = psutil.virtual_memory().percent
+    disk = psutil.disk_usage('/').percent
+
+    # Get CPU temperature if available (may not work on macOS)
+    try:
+        temp = psutil.sensors_temperatures().get('coretemp', [{}])[0].get('current', None)
+    except Exception:
+        temp = None
+
+    return {
+        'timestamp': now.strftime("%H:%M:%S"),
+        'cpu_usage': cpu_usage,
+        'memory_usage': memory,
+        'disk_usage': disk,
+        'cpu_temp': temp
+    }
+
+def monitor_system(interval=1, duration=30, live_file=None, stop=None):
     """
     Monitor CPU, memory, disk usage, and temperature at regular intervals.
     Returns a list of recorded data points.
+
+    Live mode: with live_file, every sample is also appended to that file as one
+    JSON line (with the full date, so multi-hour runs sort correctly) as soon as it
+    is taken, for dashboards to tail while the job runs; a final {"event": "end"}
+    line tells them the run is over. With stop (a threading.Event)
+    sampling ends once it is set; duration=None then samples until stop is set.
     """
     data = []
+    out = open(live_file, 'a', buffering=1) if live_file else None
+
+    try:
+        i = 0
+        while (duration is None or i < int(duration / interval)) and not (stop and stop.is_set()):
+            now = datetime.now()
+            point = sample(now)
+            data.append(point)
+            if out:
+                out.write(json.dumps({**point, 'timestamp': now.isoformat(timespec='seconds')}) + "\n")
+            i += 1
 
-    for _ in range(int(duration / interval)):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        cpu_usage = psutil.cpu_percent(interval=None)
-        memory = psutil.virtual_memory().percent
-        disk = psutil.disk_usage('/').percent
-
-        # Get CPU temperature if available (may not work on macOS)
-        try:
-            temp = psutil.sensors_temperatures().get('coretemp', [{}])[0].get('current', None)
-        except Exception:
-            temp = None
-
-        data.append({
-            'timestamp': timestamp,
-            'cpu_usage': cpu_usage,
-            'memory_usage': memory,
-            'disk_usage': disk,
-            'cpu_temp': temp
-        })
-
-        time.sleep(interval)
+            if stop:
+                stop.wait(interval)
+            else:
+                time.sleep(interval)
+    finally:
+        if out:
+            out.write(json.dumps({'event': 'end', 'timestamp': datetime.now().isoformat(timespec='seconds')}) + "\n")
+            out.close()
 
     return data